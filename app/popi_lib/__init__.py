@@ -1,5 +1,62 @@
-from .src.core import *
-from .src.escape_codes import *
-from .src.frame import *
-from .src.logger import *
-from .src.progressbar import *
+import importlib
+
+# Public names and the submodules defining them. Submodules are only imported when one of their names is first used.
+_LAZY_ATTRIBUTES = {
+    "AsyncRenderer": "aio",
+    "Registrar": "core",
+    "Base": "core",
+    "ThreadCounter": "counters",
+    "ProcessCounter": "counters",
+    "escape_code_dict": "escape_codes",
+    "terminal_supports_colors": "escape_codes",
+    "set_color_support": "escape_codes",
+    "compile_escape_codes": "escape_codes",
+    "text2escape": "escape_codes",
+    "strip_tags": "escape_codes",
+    "move_cursor": "escape_codes",
+    "Frame": "frame",
+    "ColorCodes": "logger",
+    "CustomFormatter": "logger",
+    "CustomLogger": "logger",
+    "JsonFormatter": "logger",
+    "configure_logging": "logger",
+    "get_logger": "logger",
+    "LIBRARY_LOGGER_NAME": "logger",
+    "LOG_LEVEL_ENV_VAR": "logger",
+    "LOG_FORMAT_ENV_VAR": "logger",
+    "Metrics": "metrics",
+    "RenderEvent": "metrics",
+    "metrics": "metrics",
+    "ProgressGroup": "progress_group",
+    "ProgressBar": "progressbar",
+    "Bar": "progressbar",
+    "FiraCodeProgressBar": "progressbar",
+    "StreamFrame": "stream_frame",
+    "RenderCache": "render_cache",
+    "MarkupTemplate": "template",
+    "RenderedMarkup": "template",
+    "Sink": "sinks",
+    "StreamSink": "sinks",
+    "FdSink": "sinks",
+    "BufferSink": "sinks",
+    "as_sink": "sinks",
+    "render_cache": "render_cache",
+    "render_markup": "render_cache",
+    "visible_width": "render_cache",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".src.{module_name}", __name__), name)
+    # Cache the value, so that later lookups do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+import asyncio
+from typing import Iterable, Optional, TextIO, Union
+
+from .frame import Frame
+from .metrics import metrics
+from .progress_group import _RowRenderer
+from .progressbar import ProgressBar
+from .sinks import Sink
+
+
+class AsyncRenderer(_RowRenderer):
+    """
+    An asyncio task drawing progress bars and frames below each other at a fixed rate.
+
+    Coroutines only update the state of the registered items, for example with ``ProgressBar.add`` or
+    ``Frame.edit_line``, and never wait for terminal output. The renderer composes the changed rows into one
+    buffer per refresh and writes it in an executor thread, so a slow terminal does not block the event loop.
+    Only one write is in progress at a time. Registered frames should not be printed with ``print_frame`` at the
+    same time.
+
+    :param items: The progress bars and frames to display.
+    :param refresh_rate: Number of refreshes per second while the renderer is running.
+    :param offload: Whether to write in an executor thread. If False, the output is written on the event loop.
+    :param sink: Where to write the items: a Sink, a text stream or a file descriptor. If None, the standard
+        output is used.
+    """
+
+    def __init__(
+        self,
+        items: Optional[Iterable[Union[ProgressBar, Frame]]] = None,
+        refresh_rate: float = 10.0,
+        offload: bool = True,
+        sink: Union[Sink, TextIO, int, None] = None,
+    ) -> None:
+        super().__init__(refresh_rate, sink)
+        self.items: list[Union[ProgressBar, Frame]] = list(items) if items is not None else []
+        self.offload = offload
+        self._task: Optional[asyncio.Task] = None
+        self._write: Optional[asyncio.Future] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> AsyncRenderer:
+        """Start the rendering task."""
+        return await self.astart()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop the rendering task and draw the final state."""
+        await self.astop()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"items={self.items}, refresh_rate={self.refresh_rate}, offload={self.offload})"
+        )
+
+    def add(self, item: Union[ProgressBar, Frame]) -> AsyncRenderer:
+        """
+        Add a progress bar or frame below the others.
+
+        :param item: The progress bar or frame to add.
+        :return: The updated AsyncRenderer object.
+        """
+        with self._lock:
+            self.items.append(item)
+        return self
+
+    def remove(self, item: Union[ProgressBar, Frame]) -> AsyncRenderer:
+        """
+        Remove a progress bar or frame. Its rows are removed on the next refresh.
+
+        :param item: The progress bar or frame to remove.
+        :return: The updated AsyncRenderer object.
+        """
+        with self._lock:
+            self.items.remove(item)
+        return self
+
+    async def arefresh(self, force: bool = False) -> AsyncRenderer:
+        """
+        Redraw the rows that changed since the last refresh.
+
+        :param force: Whether to write a snapshot even if the snapshot interval of a non-interactive sink has not
+            passed.
+        :return: The updated AsyncRenderer object.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            # The rows are diffed against the output of the previous write, so it has to be finished first
+            await self._finish_write()
+            output = self._compose(force)
+            if metrics.enabled:
+                metrics.count("group.redraws" if output else "group.skipped_redraws")
+            if not output:
+                return self
+            if self.offload:
+                self._write = asyncio.get_running_loop().run_in_executor(None, self.sink.write, output)
+                await self._finish_write()
+            else:
+                self.sink.write(output)
+        return self
+
+    async def astart(self) -> AsyncRenderer:
+        """
+        Draw the items and start refreshing them in a task on the running event loop.
+
+        :return: The updated AsyncRenderer object.
+        """
+        if self._task is None:
+            await self.arefresh()
+            self._task = asyncio.get_running_loop().create_task(self._arun())
+        return self
+
+    async def astop(self) -> AsyncRenderer:
+        """
+        Stop the rendering task and draw the final state of the items.
+
+        :return: The updated AsyncRenderer object.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return await self.arefresh(force=True)
+
+    async def _finish_write(self) -> None:
+        """Wait until the write running in the executor thread is done, even if the waiting task is cancelled."""
+        if self._write is None:
+            return
+        try:
+            # Cancelling the executor future would not stop the thread, so the write is kept for the next refresh
+            await asyncio.shield(self._write)
+        finally:
+            if self._write.done():
+                self._write = None
+
+    async def _arun(self) -> None:
+        """Refresh the items at the configured rate until cancelled."""
+        while True:
+            await asyncio.sleep(1 / self.refresh_rate)
+            await self.arefresh()
+
+    def _rows(self, plain: bool = False) -> list[str]:
+        """
+        Render the rows of all items, a frame taking one row per line.
+
+        :param plain: Whether to leave out all escape codes.
+        :return: List of rows.
+        """
+        rows = []
+        colors = self.sink.colors
+        for item in self.items:
+            if isinstance(item, Frame):
+                rows.extend(item._build_frame(plain, colors))
+            else:
+                rows.append(item.render(plain, colors))
+        return rows
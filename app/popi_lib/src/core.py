@@ -1,16 +1,21 @@
 from __future__ import annotations
-from .logger import CustomLogger
+from abc import ABCMeta
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import logging
 
 
 class Registrar(type):
-    """Metaclass for registering classes."""
+    """Metaclass for registering classes. Private classes, whose names start with an underscore, are not registered."""
     registry = {}
 
     def __new__(cls, name, bases, dct) -> Registrar:
         # Create the new class as usual
         new_class = super().__new__(cls, name, bases, dct)
         # Register the new class
-        cls.registry[name] = new_class
+        if not name.startswith("_"):
+            cls.registry[name] = new_class
         return new_class
 
     @classmethod
@@ -29,11 +34,26 @@ class Registrar(type):
         return f"{self.__name__}({self.registry})"
 
 
+class _AbstractRegistrar(Registrar, ABCMeta):
+    """Metaclass for library base classes with abstract methods, which cannot be instantiated until implemented."""
+
+
+class _ClassLogger:
+    """Descriptor creating the logger of a class on first access."""
+
+    def __get__(self, instance, owner) -> logging.Logger:
+        logger = owner.__dict__.get("_logger")
+        if logger is None:
+            # The logging setup is only imported once a class actually logs something
+            from .logger import get_logger
+            logger = get_logger(owner.__name__)
+            owner._logger = logger
+        return logger
+
+
 class Base(metaclass=Registrar):
     """Base class for all classes in the library."""
-    def __init_subclass__(cls, **kwargs):
-        super().__init_subclass__(**kwargs)
-        cls.logger = CustomLogger(name=cls.__name__, debug=True)
+    logger = _ClassLogger()
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}()"
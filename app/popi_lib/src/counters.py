@@ -0,0 +1,90 @@
+from __future__ import annotations
+import threading
+
+
+class ThreadCounter:
+    """
+    A progress counter that can be updated from several threads at once.
+
+    :param value: The initial value.
+    """
+
+    def __init__(self, value: int = 0) -> None:
+        self._value = value
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(value={self.value})"
+
+    @property
+    def value(self) -> int:
+        """The current value of the counter."""
+        return self._value
+
+    def add(self, amount: int) -> ThreadCounter:
+        """
+        Increase the counter by a specified amount.
+
+        :param amount: The amount to add.
+        :return: The updated ThreadCounter object.
+        """
+        with self._lock:
+            self._value += amount
+        return self
+
+    def set(self, value: int) -> ThreadCounter:
+        """
+        Set the counter to a specific value.
+
+        :param value: The new value.
+        :return: The updated ThreadCounter object.
+        """
+        with self._lock:
+            self._value = value
+        return self
+
+
+class ProcessCounter:
+    """
+    A progress counter in shared memory that can be updated from several processes at once.
+
+    Like any shared memory object, the counter has to be passed to the worker processes when they are created,
+    for example through the ``initializer`` and ``initargs`` of a ``ProcessPoolExecutor``.
+
+    :param value: The initial value.
+    """
+
+    def __init__(self, value: int = 0) -> None:
+        # multiprocessing is slow to import and only needed once a ProcessCounter is created
+        import multiprocessing
+        self._value = multiprocessing.Value("q", value)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(value={self.value})"
+
+    @property
+    def value(self) -> int:
+        """The current value of the counter."""
+        return self._value.value
+
+    def add(self, amount: int) -> ProcessCounter:
+        """
+        Increase the counter by a specified amount.
+
+        :param amount: The amount to add.
+        :return: The updated ProcessCounter object.
+        """
+        with self._value.get_lock():
+            self._value.value += amount
+        return self
+
+    def set(self, value: int) -> ProcessCounter:
+        """
+        Set the counter to a specific value.
+
+        :param value: The new value.
+        :return: The updated ProcessCounter object.
+        """
+        with self._value.get_lock():
+            self._value.value = value
+        return self
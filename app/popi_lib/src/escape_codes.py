@@ -1,9 +1,32 @@
+from __future__ import annotations
 import os
+import re
 import sys
+from typing import Callable, Optional
 
-import colorama
 
-escape_code_dict: dict = {
+def _counting_mutator(method):
+    def mutator(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutator.__name__ = method.__name__
+    mutator.__doc__ = method.__doc__
+    return mutator
+
+
+class _TagTable(dict):
+    """A dict counting its modifications, so that the compiled tag pattern can follow them."""
+
+    version = 0
+
+
+for _name in ("__setitem__", "__delitem__", "__ior__", "clear", "pop", "popitem", "setdefault", "update"):
+    if hasattr(dict, _name):
+        setattr(_TagTable, _name, _counting_mutator(getattr(dict, _name)))
+
+
+escape_code_dict: dict = _TagTable({
     "": "",
     "<reset>": "\033[0m",
     "<b>": "\033[1m",
@@ -42,18 +65,28 @@ escape_code_dict: dict = {
     "<bright_cyan_bg>": "\033[106m",
     "<bright_white_bg>": "\033[107m",
     "<hr>": "",
-}
+})
 
 
-def terminal_supports_colors() -> bool:
-    """
-    Check if the terminal supports ANSI escape codes.
+_color_support: Optional[bool] = None
+_color_stream = None
+_color_override: Optional[bool] = None
+_colorama_initialised = False
+_tag_pattern: Optional[re.Pattern] = None
+# The pattern with the function replacing its matches, and the table and version they were compiled from
+_compiled: Optional[tuple[re.Pattern, Callable[[re.Match], str]]] = None
+_compiled_from: tuple = (None, None)
 
-    :return: True if the terminal supports ANSI escape codes, False otherwise.
-    """
+
+def _probe_colors() -> bool:
+    """Probe the current standard output for ANSI escape code support."""
+    global _colorama_initialised
     # Initialise colorama
-    if os.name == "nt":
+    if os.name == "nt" and not _colorama_initialised:
+        # colorama is only needed on Windows, so it is not imported anywhere else
+        import colorama
         colorama.init()
+        _colorama_initialised = True
     # Check if the terminal runs on Windows and supports ANSI escape codes
     if os.name == "nt":
         return sys.stdout.isatty()
@@ -64,10 +97,112 @@ def terminal_supports_colors() -> bool:
     return False
 
 
-def text2escape(html: str) -> str:
-    for key, value in escape_code_dict.items():
-        if terminal_supports_colors():
-            html = html.replace(key, value)
-        else:
-            html = html.replace(key, "")
-    return html
+def terminal_supports_colors(refresh: bool = False) -> bool:
+    """
+    Check if the terminal supports ANSI escape codes.
+
+    The result is cached for the current ``sys.stdout`` object, so repeated calls do not probe the terminal again.
+
+    :param refresh: Whether to discard the cached result and probe the terminal again.
+    :return: True if the terminal supports ANSI escape codes, False otherwise.
+    """
+    global _color_support, _color_stream
+    if _color_override is not None:
+        return _color_override
+    if refresh or _color_support is None or _color_stream is not sys.stdout:
+        _color_support = _probe_colors()
+        _color_stream = sys.stdout
+    return _color_support
+
+
+def set_color_support(enabled: Optional[bool]) -> None:
+    """
+    Force ANSI escape codes on or off, regardless of the terminal.
+
+    :param enabled: True or False to force color support, None to return to terminal detection.
+    """
+    global _color_override
+    _color_override = enabled
+
+
+def compile_escape_codes() -> re.Pattern:
+    """
+    Compile the tags in ``escape_code_dict`` into a single pattern.
+
+    This is done automatically on first use and after ``escape_code_dict`` was modified or replaced.
+
+    :return: The compiled pattern matching any known tag.
+    """
+    global _tag_pattern, _compiled, _compiled_from
+    table = escape_code_dict
+    version = _table_version(table)
+    # The replacements are a copy, so that they always match the tags of the pattern
+    codes = {key: value for key, value in table.items() if key}
+    # Longest tags first, so that a tag is never shadowed by one of its prefixes
+    tags = sorted(codes, key=len, reverse=True)
+    pattern = re.compile("|".join(map(re.escape, tags)) if tags else r"(?!)")
+    _compiled = (pattern, lambda match: codes[match.group()])
+    _compiled_from = (table, version)
+    _tag_pattern = pattern
+    return pattern
+
+
+def _table_version(table: dict) -> int:
+    """Get the modification count of a tag table, or its size for plain dicts."""
+    return getattr(table, "version", len(table))
+
+
+def _current_compiled() -> tuple[re.Pattern, Callable[[re.Match], str]]:
+    """Get the compiled tag pattern and replacement function, compiling them again if the tag table changed."""
+    compiled = _compiled
+    table, version = _compiled_from
+    if compiled is None or table is not escape_code_dict or version != _table_version(escape_code_dict):
+        compile_escape_codes()
+        compiled = _compiled
+    return compiled
+
+
+def _current_pattern() -> re.Pattern:
+    """Get the compiled tag pattern, compiling it again if the tag table changed."""
+    return _current_compiled()[0]
+
+
+def text2escape(html: str, colors: Optional[bool] = None) -> str:
+    """
+    Translate markup tags to ANSI escape codes in a single pass.
+
+    :param html: Text containing markup tags such as ``<b>`` or ``<red>``.
+    :param colors: Whether to emit escape codes. If None, the terminal is checked. If False, tags are stripped.
+    :return: The translated text.
+    """
+    pattern, replace_tag = _current_compiled()
+    if colors is None:
+        colors = terminal_supports_colors()
+    if colors:
+        return pattern.sub(replace_tag, html)
+    return pattern.sub("", html)
+
+
+def strip_tags(html: str) -> str:
+    """
+    Remove all markup tags from the text.
+
+    :param html: Text containing markup tags.
+    :return: The plain text.
+    """
+    return text2escape(html, colors=False)
+
+
+def move_cursor(row: int, target_row: int) -> str:
+    """
+    Get the escape code moving the cursor from one row to the start of another.
+
+    :param row: The row the cursor is on.
+    :param target_row: The row to move the cursor to.
+    :return: The escape code, or an empty string if the rows are the same.
+    """
+    if target_row > row:
+        return f"\033[{target_row - row}E"
+    if target_row < row:
+        return f"\033[{row - target_row}F"
+    return ""
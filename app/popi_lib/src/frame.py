@@ -1,32 +1,114 @@
 from __future__ import annotations
-import sys
-from functools import reduce
+import re
+import shutil
+from collections import Counter, deque
+from itertools import islice
+from time import perf_counter
+from typing import Optional, TextIO, Union
 
 from .core import Base
-from .escape_codes import (
-    text2escape as t2e,
-    escape_code_dict,
-    terminal_supports_colors as tsc
-)
+from . import escape_codes
+from .escape_codes import move_cursor, strip_tags
+from .metrics import metrics
+from .render_cache import _translate
+from .sinks import Sink, as_sink
+from .template import MarkupTemplate, RenderedMarkup
+
+_sgr_pattern = re.compile(r"\033\[[0-9;]*m")
+
+
+def _split_lines(content: list[str] | str | MarkupTemplate, values: dict) -> list[str]:
+    """Turn the content passed to add_line into a list of lines."""
+    if isinstance(content, MarkupTemplate):
+        return [content.format(**values)]
+    if isinstance(content, RenderedMarkup):
+        return [content]
+    return content.split('\n') if isinstance(content, str) else list(content)
+
+
+class _ChangeTracking:
+    """Mixin for line containers that remember whether they were modified since the line widths were measured."""
+
+    changed = True
+
+
+def _tracking_mutator(method):
+    def mutator(self, *args, **kwargs):
+        self.changed = True
+        return method(self, *args, **kwargs)
+
+    mutator.__name__ = method.__name__
+    mutator.__doc__ = method.__doc__
+    return mutator
+
+
+class _TrackedList(_ChangeTracking, list):
+    """List of lines of a frame, flagging every in-place modification."""
+
+
+class _TrackedDeque(_ChangeTracking, deque):
+    """Deque of lines of a frame, flagging every in-place modification."""
+
+
+for _name in (
+    "__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "pop", "remove", "clear",
+    "sort", "reverse",
+):
+    setattr(_TrackedList, _name, _tracking_mutator(getattr(list, _name)))
+for _name in (
+    "__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "appendleft", "extend", "extendleft", "insert",
+    "pop", "popleft", "remove", "clear", "rotate", "reverse",
+):
+    setattr(_TrackedDeque, _name, _tracking_mutator(getattr(deque, _name)))
 
 
 class Frame(Base):
-    reset_code = t2e("<reset>")
 
-    def __init__(self, content: list[str] | str, padding: int = 1, width: int = None, frame_style: str = "") -> None:
+    def __init__(
+        self,
+        content: list[str] | str,
+        padding: int = 1,
+        width: int = None,
+        frame_style: str = "",
+        viewport: bool = False,
+        height: Optional[int] = None,
+        sink: Union[Sink, TextIO, int, None] = None,
+    ) -> None:
         """
         Initialize the Frame object.
 
-        :param content: List of strings or a single string to be framed.
+        :param content: List of strings or a single string to be framed. The frame keeps its own copy of a list;
+            modify the lines through the frame or its ``lines`` attribute.
         :param padding: Padding around the text within the frame.
         :param width: Width of the frame. If None, it will be auto-calculated.
         :param frame_style: Escape code for frame styling.
+        :param viewport: Whether to display only a window of the lines. Only the visible lines are rendered and
+            measured, and the width of the frame is that of the widest visible line.
+        :param height: Number of lines in the viewport. If None, it is fitted to the terminal height.
+        :param sink: Where to write the frame: a Sink, a text stream or a file descriptor. If None, the standard
+            output is used. If the sink is not interactive, plain-text snapshots of the frame are written instead.
         """
         self.lines = content.split('\n') if isinstance(content, str) else content
+        self.sink = as_sink(sink)
         self.padding = padding
-        self.width = self._calculate_width() if width is None else width
+        self.viewport = viewport
+        self.height = height
+        self.offset = 0
+        self.following = True
+        self._line_widths: list[int] = []
+        self._width_counts: Counter[int] = Counter()
+        self._max_width = 0
+        # Translated lines are kept per frame, so that frames with many lines do not evict the shared render cache
+        self._line_renders: dict[str, tuple[str, int]] = {}
+        self._line_renders_key: tuple = (None, None)
+        content_width = self._content_width()
+        self.width = content_width if width is None else width
         self.frame_style = frame_style
         self.num_lines = len(self.lines)
+        self._rendered: list[tuple[str, str, int]] = []
+        self._renderer = None
+        self._snapshot: Optional[list[str]] = None
+        self._snapshot_time: Optional[float] = None
 
         self.add_ln = self.add_line
         self.add_hr = self.add_horizontal_rule
@@ -38,21 +120,63 @@ class Frame(Base):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        """Exit the runtime context. No action needed."""
-        pass
+        """Exit the runtime context, writing the final snapshot if the sink is not interactive."""
+        if not self.sink.interactive:
+            self._write_snapshot(force=True)
+
+    async def __aenter__(self) -> Frame:
+        """Enter the runtime context for using 'async with' statement, redrawing the frame from an asyncio task."""
+        from .aio import AsyncRenderer
+        self._renderer = AsyncRenderer([self], sink=self.sink)
+        await self._renderer.astart()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Exit the runtime context, stopping the asyncio task after drawing the final state."""
+        await self._renderer.astop()
+        self._renderer = None
 
     def __repr__(self) -> str:
         """Return a string representation of the frame."""
         return "\n".join(self._build_frame())
 
-    def add_line(self, content: list[str] | str) -> Frame:
+    @property
+    def lines(self) -> list[str]:
+        """
+        The lines of the frame. Modifying them in place is allowed; the width of the frame is then measured again.
+        """
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: list[str]) -> None:
+        # Lists and deques are copied into containers that flag modifications, other containers are kept as-is
+        if isinstance(lines, deque):
+            lines = _TrackedDeque(lines, lines.maxlen)
+        elif isinstance(lines, list):
+            lines = _TrackedList(lines)
+        self._lines = lines
+
+    @property
+    def reset_code(self) -> str:
+        """The escape code resetting all styles, or an empty string if the sink does not support it."""
+        self._check_line_renders()
+        return self._render_line("<reset>")[0]
+
+    def add_line(self, content: list[str] | str | MarkupTemplate, **values) -> Frame:
         """
         Add lines to the frame.
 
-        :param content: Line(s) to add to the frame.
+        :param content: Line(s) to add to the frame, or a template for a single line.
+        :param values: The values of the template fields, if content is a template.
         :return: The updated Frame object.
         """
-        self.lines.extend(content.split('\n') if isinstance(content, str) else content)
+        new_lines = _split_lines(content, values)
+        in_sync = self._is_tracked()
+        self.lines.extend(new_lines)
+        if in_sync:
+            for line in new_lines:
+                self._track_width(self._render_line(line)[1])
+            self.lines.changed = False
         return self._update_frame()
 
     def add_horizontal_rule(self) -> Frame:
@@ -61,70 +185,311 @@ class Frame(Base):
 
         :return: The updated Frame object.
         """
+        in_sync = self._is_tracked()
         self.lines.append("<hr>")
+        if in_sync:
+            self._track_width(0)
+            self.lines.changed = False
         return self
 
-    def edit_line(self, line_index: int, new_content: str) -> Frame:
+    def edit_line(self, line_index: int, new_content: str | MarkupTemplate, **values) -> Frame:
         """
         Edit a specific line in the frame.
 
         :param line_index: Index of the line to edit.
-        :param new_content: New content for the line.
+        :param new_content: New content for the line, or a template for it.
+        :param values: The values of the template fields, if new_content is a template.
         :return: The updated Frame object.
         """
+        if isinstance(new_content, MarkupTemplate):
+            new_content = new_content.format(**values)
+        in_sync = self._is_tracked()
         self.lines[line_index] = new_content
+        if in_sync:
+            self._untrack_width(self._line_widths[line_index])
+            new_width = self._render_line(new_content)[1]
+            self._line_widths[line_index] = new_width
+            self._width_counts[new_width] += 1
+            self._max_width = max(self._max_width, new_width)
+            self.lines.changed = False
         return self._update_frame()
 
-    def print_frame(self) -> None:
-        """Print the frame to the console."""
-        self.width = self._calculate_width()
-        sys.stdout.write(f"\033[{self.num_lines + 2}F")
-        sys.stdout.flush()
-        self._display_frame()
+    @property
+    def viewport_height(self) -> int:
+        """The number of lines shown in viewport mode."""
+        if self.height is not None:
+            return max(1, self.height)
+        # Leave room for the borders and the line the cursor rests on
+        return max(1, shutil.get_terminal_size().lines - 3)
+
+    def scroll(self, lines: int) -> Frame:
+        """
+        Scroll the viewport and stop following the last line.
+
+        :param lines: Number of lines to scroll down, or up if negative.
+        :return: The updated Frame object.
+        """
+        return self.scroll_to(self._first_visible_line() + lines)
+
+    def scroll_to(self, line_index: int) -> Frame:
+        """
+        Scroll the viewport to show the given line first and stop following the last line.
+
+        :param line_index: Index of the first visible line.
+        :return: The updated Frame object.
+        """
+        self.offset = max(0, min(line_index, len(self.lines) - self.viewport_height))
+        self.following = False
+        return self._update_frame()
+
+    def follow(self, enabled: bool = True) -> Frame:
+        """
+        Keep the viewport scrolled to the last line as lines are added.
+
+        :param enabled: Whether to follow the last line.
+        :return: The updated Frame object.
+        """
+        self.following = enabled
+        return self._update_frame()
+
+    def print_frame(self, force: bool = False) -> None:
+        """
+        Print the frame to the console, rewriting only the rows that changed since the last print.
+
+        If the sink is not interactive, a plain-text snapshot is written instead, at most once per snapshot interval
+        of the sink.
+
+        :param force: Whether to write a snapshot even if the snapshot interval has not passed.
+        """
+        self.width = self._content_width()
+        if not self.sink.interactive:
+            written = self._write_snapshot(force)
+        else:
+            update = self._render_update(self._build_rows())
+            written = bool(update)
+            if written:
+                self.sink.write(update)
         self.num_lines = len(self.lines)
+        if metrics.enabled:
+            metrics.count("frame.redraws" if written else "frame.skipped_redraws")
 
     def _display_frame(self) -> None:
         """Write the frame to the console output."""
-        if not tsc():
-            self.logger.critical("Terminal does not fully support ANSI escape codes. Frame cannot be displayed.")
+        if not self.sink.interactive:
+            self._write_snapshot(force=True)
             return
-        for line in self._build_frame():
-            sys.stdout.write(f"\033[K{line}\n")
-        sys.stdout.flush()
+        rows = self._build_rows()
+        self.sink.write("".join(f"\033[K{head}{tail}\n" for head, tail, _ in rows))
+        self._rendered = rows
+
+    def _write_snapshot(self, force: bool = False) -> bool:
+        """
+        Write the frame as plain text if it changed and the snapshot interval has passed.
 
-    def _build_frame(self) -> list[str]:
+        :param force: Whether to ignore the snapshot interval.
+        :return: Whether a snapshot was written.
+        """
+        now = perf_counter()
+        if not force and self._snapshot_time is not None and now - self._snapshot_time < self.sink.snapshot_interval:
+            return False
+        snapshot = self._build_frame(plain=True)
+        if snapshot == self._snapshot:
+            return False
+        self.sink.write("\n".join(snapshot) + "\n")
+        self._snapshot = snapshot
+        self._snapshot_time = now
+        return True
+
+    def _build_frame(self, plain: bool = False, colors: Optional[bool] = None) -> list[str]:
         """
         Construct the frame with borders and content.
 
+        :param plain: Whether to leave out all escape codes.
+        :param colors: Whether to use escape codes for colors and styles. If None, the color support of the sink is
+            used.
         :return: List of strings representing the frame.
         """
-        top_border = f"{t2e(self.frame_style)}╭{'─' * (self.width + 2 * self.padding)}╮{self.reset_code}"
-        bottom_border = f"{t2e(self.frame_style)}╰{'─' * (self.width + 2 * self.padding)}╯{self.reset_code}"
+        return [head + tail for head, tail, _ in self._build_rows(plain, colors)]
 
-        frame_lines = [top_border]
-        for line in self.lines:
+    def _build_rows(self, plain: bool = False, colors: Optional[bool] = None) -> list[tuple[str, str, int]]:
+        """
+        Construct the rows of the frame, split where the content ends and the right border begins.
+
+        :param plain: Whether to leave out all escape codes.
+        :param colors: Whether to use escape codes for colors and styles. If None, the color support of the sink is
+            used.
+        :return: List of (head, tail, head_columns) tuples, where head is the left border and content, tail is
+            the padding and right border, and head_columns is the visible width of head.
+        """
+        if metrics.enabled:
+            return metrics.timed("frame.build", self, self._construct_rows, plain, colors)
+        return self._construct_rows(plain, colors)
+
+    def _construct_rows(self, plain: bool, colors: Optional[bool] = None) -> list[tuple[str, str, int]]:
+        """Construct the rows of the frame, see ``_build_rows``."""
+        line_renders = self._check_line_renders(colors)
+        if self.viewport or (isinstance(self.lines, _ChangeTracking) and self.lines.changed):
+            # The width depends on which lines are visible in viewport mode, so it is only measured when rendering.
+            # Otherwise, the tag table changed since the lines were measured
+            self.width = self._content_width()
+        style = "" if plain else self._render_line(self.frame_style)[0]
+        reset_code = "" if plain else self._render_line("<reset>")[0]
+        top_border = f"{style}╭{'─' * (self.width + 2 * self.padding)}╮{reset_code}"
+        bottom_border = f"{style}╰{'─' * (self.width + 2 * self.padding)}╯{reset_code}"
+        left_border = f"{reset_code}{style}│{reset_code}{' ' * self.padding}"
+        right_border = f"{reset_code}{style}│{reset_code}"
+
+        rows = [("", top_border, 0)]
+        for line in self._visible_lines():
             if line == "<hr>":
-                frame_lines.append(f"{t2e(self.frame_style)}├{'─' * (self.width + 2 * self.padding)}┤{self.reset_code}")
+                rows.append(("", f"{style}├{'─' * (self.width + 2 * self.padding)}┤{reset_code}", 0))
+            else:
+                if plain:
+                    rendered_line = strip_tags(line)
+                    clean_length = len(rendered_line)
+                else:
+                    entry = line_renders.get(line)
+                    rendered_line, clean_length = entry if entry is not None else self._render_line(line)
+                rows.append((
+                    f"{left_border}{rendered_line}",
+                    f"{' ' * (self.width - clean_length + self.padding)}{right_border}",
+                    1 + self.padding + clean_length,
+                ))
+
+        rows.append(("", bottom_border, 0))
+        return rows
+
+    def _render_update(self, rows: list[tuple[str, str, int]]) -> str:
+        """
+        Build the output that turns the previously rendered rows into the given rows.
+
+        The cursor is expected below the last rendered row and is left below the new last row. Unchanged rows are
+        skipped, and rows whose content is unchanged only get their padding and right border rewritten.
+
+        :param rows: The new rows, as returned by ``_build_rows``.
+        :return: The escape codes and text to write.
+        """
+        previous = self._rendered
+        output = []
+        cursor = len(previous)
+        reset_code = self._render_line("<reset>")[0]
+        for index, (row, old_row) in enumerate(zip(rows, previous)):
+            if row == old_row:
+                continue
+            output.append(move_cursor(cursor, index))
+            cursor = index
+            head, tail, head_columns = row
+            if head and head == old_row[0]:
+                # Restore the graphics state at the end of the content before rewriting the tail
+                sgr_state = "".join(_sgr_pattern.findall(head))
+                output.append(f"\033[{head_columns + 1}G{reset_code}\033[K{sgr_state}{tail}")
             else:
-                clean_length = len(reduce(lambda s, esc: s.replace(esc, ''), escape_code_dict.keys(), line))
-                padded_line = (
-                    f"{self.reset_code}{t2e(self.frame_style)}│{self.reset_code}{' ' * self.padding}"
-                    f"{t2e(line)}{' ' * (self.width - clean_length + self.padding)}"
-                    f"{self.reset_code}{t2e(self.frame_style)}│{self.reset_code}"
-                )
-                frame_lines.append(padded_line)
+                output.append(f"\033[K{head}{tail}")
 
-        frame_lines.append(bottom_border)
-        return frame_lines
+        if len(rows) > len(previous):
+            output.append(move_cursor(cursor, len(previous)))
+            output.extend(f"\033[K{head}{tail}\n" for head, tail, _ in rows[len(previous):])
+        elif len(rows) < len(previous):
+            output.append(move_cursor(cursor, len(rows)))
+            output.append("\033[J")
+        else:
+            output.append(move_cursor(cursor, len(rows)))
+
+        self._rendered = rows
+        return "".join(output)
 
     def _calculate_width(self) -> int:
-        """Calculate the width of the frame based on content."""
-        return max(
-            len(reduce(lambda s, esc: s.replace(esc, ''), escape_code_dict.keys(), line))
-            for line in self.lines
+        """Calculate the width of the frame based on content, measuring every line again."""
+        self._line_widths = [self._render_line(line)[1] for line in self.lines]
+        self._width_counts = Counter(self._line_widths)
+        self._max_width = max(self._width_counts, default=0)
+        if isinstance(self.lines, _ChangeTracking):
+            self.lines.changed = False
+        return self._max_width
+
+    def _content_width(self) -> int:
+        """Return the width of the widest line, measuring every line again only if the lines changed externally."""
+        if self.viewport:
+            return max((self._render_line(line)[1] for line in self._visible_lines()), default=0)
+        if not self._is_tracked():
+            return self._calculate_width()
+        return self._max_width
+
+    def _is_tracked(self) -> bool:
+        """
+        Check whether the tracked line widths still match the lines, which is the case unless the lines were modified
+        directly. Widths are not tracked in viewport mode or for containers other than lists and deques.
+        """
+        lines = self.lines
+        return (
+            not self.viewport and isinstance(lines, _ChangeTracking) and not lines.changed
+            and len(self._line_widths) == len(lines)
         )
 
+    def _first_visible_line(self) -> int:
+        """Return the index of the first line in the viewport."""
+        if self.following:
+            return max(0, len(self.lines) - self.viewport_height)
+        return max(0, min(self.offset, len(self.lines) - self.viewport_height))
+
+    def _visible_lines(self) -> list[str]:
+        """Return the lines to display, which are all lines unless in viewport mode."""
+        if not self.viewport:
+            return self.lines
+        first_line = self._first_visible_line()
+        if isinstance(self.lines, list):
+            return self.lines[first_line:first_line + self.viewport_height]
+        return list(islice(self.lines, first_line, first_line + self.viewport_height))
+
+    def _render_line(self, line: str) -> tuple[str, int]:
+        """Get the ANSI translation and visible width of a line, keeping them for later redraws."""
+        entry = self._line_renders.get(line)
+        if entry is None:
+            if self._line_renders_key[0] is None:
+                self._check_line_renders()
+            if len(self._line_renders) > 2 * len(self.lines) + 64:
+                # Most kept translations are of lines that were replaced or removed since
+                self._line_renders = {}
+            entry = self._line_renders[line] = _translate(line, self._line_renders_key[0])
+        return entry
+
+    def _check_line_renders(self, colors: Optional[bool] = None) -> dict[str, tuple[str, int]]:
+        """
+        Discard the kept translations if the color support or the tag table changed.
+
+        :param colors: Whether the lines are translated with escape codes for colors and styles. If None, the color
+            support of the sink is used.
+        :return: The kept translations.
+        """
+        if colors is None:
+            colors = self.sink.colors
+        pattern = escape_codes._current_pattern()
+        if colors != self._line_renders_key[0] or pattern is not self._line_renders_key[1]:
+            if self._line_renders_key[1] not in (None, pattern) and isinstance(self.lines, _ChangeTracking):
+                # The widths of the lines depend on which tags are known, so they are measured again
+                self.lines.changed = True
+            self._line_renders = {}
+            self._line_renders_key = (colors, pattern)
+        return self._line_renders
+
+    def _track_width(self, width: int) -> None:
+        """Record the width of a line appended to the frame."""
+        self._line_widths.append(width)
+        self._width_counts[width] += 1
+        if width > self._max_width:
+            self._max_width = width
+
+    def _untrack_width(self, width: int) -> None:
+        """Forget the width of a line that was replaced or removed."""
+        self._width_counts[width] -= 1
+        if not self._width_counts[width]:
+            del self._width_counts[width]
+            if width == self._max_width:
+                # Only the distinct widths are scanned, not the lines
+                self._max_width = max(self._width_counts, default=0)
+
     def _update_frame(self) -> Frame:
         """Update the frame's dimensions and line count."""
-        self.width = self._calculate_width()
+        if not self.viewport:
+            self.width = self._content_width()
         return self
@@ -1,8 +1,19 @@
+from __future__ import annotations
+import atexit
+import copy
+import json
 import logging
-from typing import Literal
+import logging.handlers
+import os
+import queue
+import threading
+import warnings
+from typing import Any, Literal, Optional
 from datetime import datetime
+from json.encoder import encode_basestring
 
 from .escape_codes import terminal_supports_colors as tsc
+from .metrics import metrics
 
 
 class ColorCodes:
@@ -22,49 +33,428 @@ class CustomFormatter(logging.Formatter):
     default_time_format = "%Y-%m-%d %H:%M:%S"
     _fmt = "{message}"
 
-    if tsc():
-        FORMATS = {
-            logging.DEBUG: f"\033[38;5;30m[{{asctime}}] {ColorCodes.GRAY + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + _fmt + ColorCodes.RESET,
-            logging.INFO: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_GREEN + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + ColorCodes.WHITE + _fmt + ColorCodes.RESET,
-            logging.WARNING: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_YELLOW + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + ColorCodes.YELLOW + _fmt + ColorCodes.RESET,
-            logging.ERROR: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_RED + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + _fmt + ColorCodes.RESET,
-            logging.CRITICAL: f"\033[01;38;5;203m[{{asctime}}] {ColorCodes.BOLD_STRONG_RED + '{levelname:>5s}'}: " + _fmt + ColorCodes.RESET
-        }
-    else:
-        FORMATS = {
-            logging.DEBUG: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
-            logging.INFO: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
-            logging.WARNING: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
-            logging.ERROR: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
-            logging.CRITICAL: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt
-        }
+    COLOR_FORMATS = {
+        logging.DEBUG: f"\033[38;5;30m[{{asctime}}] {ColorCodes.GRAY + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + _fmt + ColorCodes.RESET,
+        logging.INFO: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_GREEN + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + ColorCodes.WHITE + _fmt + ColorCodes.RESET,
+        logging.WARNING: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_YELLOW + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + ColorCodes.YELLOW + _fmt + ColorCodes.RESET,
+        logging.ERROR: f"\033[38;5;44m[{{asctime}}] {ColorCodes.BOLD_RED + '{levelname:>5s}' + ColorCodes.RESET_WEIGHT}: " + _fmt + ColorCodes.RESET,
+        logging.CRITICAL: f"\033[01;38;5;203m[{{asctime}}] {ColorCodes.BOLD_STRONG_RED + '{levelname:>5s}'}: " + _fmt + ColorCodes.RESET
+    }
+    PLAIN_FORMATS = {
+        logging.DEBUG: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
+        logging.INFO: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
+        logging.WARNING: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
+        logging.ERROR: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt,
+        logging.CRITICAL: f"[{{asctime}}] {'{levelname:>5s}'}: " + _fmt
+    }
+    # Chosen from the formats above when the first formatter is created, unless set by a subclass
+    FORMATS: Optional[dict[int, str]] = None
 
     def __init__(self, style: Literal["%", "{", "$"] = "{", datefmt: str = default_time_format):
         logging.addLevelName(logging.WARNING, "WARN")
         super().__init__(style=style, datefmt=datefmt)
+        if self.FORMATS is None:
+            type(self).FORMATS = self.COLOR_FORMATS if tsc() else self.PLAIN_FORMATS
+        self._time_cache: tuple[int, Optional[str], str] = (-1, None, "")
+        # The formatters are compiled once per level instead of once per record
+        self._formatters = {level: _LevelFormatter(fmt, self) for level, fmt in self.FORMATS.items()}
+        self._default_formatter = _LevelFormatter(self._fmt, self)
 
     def formatTime(self, record, datefmt=None):
-        dt = datetime.fromtimestamp(record.created)
-        if datefmt:
-            return dt.strftime(datefmt)
-        return dt.strftime(self.default_time_format)
+        datefmt = datefmt or self.default_time_format
+        if "%f" in datefmt:
+            return datetime.fromtimestamp(record.created).strftime(datefmt)
+        # Records within the same second share the formatted time
+        seconds = int(record.created)
+        cached_seconds, cached_datefmt, cached_time = self._time_cache
+        if seconds != cached_seconds or datefmt != cached_datefmt:
+            cached_time = datetime.fromtimestamp(seconds).strftime(datefmt)
+            self._time_cache = (seconds, datefmt, cached_time)
+        return cached_time
 
     def format(self, record):
-        if not hasattr(record, 'asctime'):
-            record.asctime = self.formatTime(record, self.datefmt)
-        log_fmt = self.FORMATS.get(record.levelno, self._fmt)
-        formatter = logging.Formatter(log_fmt, datefmt=self.datefmt, style='{')
+        formatter = self._formatters.get(record.levelno, self._default_formatter)
+        if metrics.enabled:
+            return metrics.timed("logger.format", self, formatter.format, record)
         return formatter.format(record)
 
 
+class _LevelFormatter(logging.Formatter):
+    """Formatter for a single level of a CustomFormatter, using its cached time formatting."""
+
+    def __init__(self, fmt: str, parent: CustomFormatter) -> None:
+        super().__init__(fmt, datefmt=parent.datefmt, style="{")
+        self._parent = parent
+
+    def formatTime(self, record, datefmt=None):
+        return self._parent.formatTime(record, datefmt)
+
+
+# Attributes of every LogRecord; all other attributes were passed with ``extra`` and are added to JSON records
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+# Keys written by the JsonFormatter itself
+_JSON_KEYS = frozenset({"time", "level", "logger", "message", "exc_info", "stack_info"})
+# Names of the standard levels, independent of names registered with logging.addLevelName
+_LEVEL_NAMES = {
+    logging.CRITICAL: "CRITICAL", logging.ERROR: "ERROR", logging.WARNING: "WARNING", logging.INFO: "INFO",
+    logging.DEBUG: "DEBUG", logging.NOTSET: "NOTSET",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter writing each record as one line of JSON, for log collectors instead of terminals.
+
+    Every object has the keys ``time`` (ISO 8601 with milliseconds and UTC offset), ``level``, ``logger`` and
+    ``message``, followed by the static fields, the fields passed with ``extra``, and ``exc_info`` and
+    ``stack_info`` if present. Static and extra fields named like one of these keys, or extra fields named like a
+    static field, are prefixed with ``extra_``. The standard levels always have their standard names, even if
+    another name was registered, for example "WARN" by the CustomFormatter. No colors or format strings are used.
+    The keys, level names and logger names are encoded once, and the timestamp is formatted once per second.
+
+    :param static_fields: Fields added to every record, for example the service name.
+    """
+
+    def __init__(self, static_fields: Optional[dict[str, Any]] = None) -> None:
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+        reserved = set(_JSON_KEYS)
+        static_parts = []
+        for key, value in self.static_fields.items():
+            key = _unique_key(str(key), reserved)
+            reserved.add(key)
+            static_parts.append(f",{encode_basestring(key)}:{_encode(value)}")
+        self._static = "".join(static_parts)
+        self._reserved = frozenset(reserved)
+        self._fields: dict[tuple[int, str, str], str] = {}
+        self._time_cache: tuple[int, str, str] = (-1, "", "")
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        # Records within the same second share the formatted date, time and UTC offset
+        seconds = int(record.created)
+        cached_seconds, head, offset = self._time_cache
+        if seconds != cached_seconds:
+            timestamp = datetime.fromtimestamp(seconds).astimezone().isoformat(timespec="seconds")
+            head, offset = timestamp[:19], timestamp[19:]
+            self._time_cache = (seconds, head, offset)
+        return f"{head}.{int(record.msecs):03d}{offset}"
+
+    def format(self, record):
+        if metrics.enabled:
+            return metrics.timed("logger.format", self, self._format, record)
+        return self._format(record)
+
+    def _format(self, record) -> str:
+        cache_key = (record.levelno, record.levelname, record.name)
+        fields = self._fields.get(cache_key)
+        if fields is None:
+            # The level and logger keys of a record only depend on its level and logger, so they are encoded once
+            level = encode_basestring(_LEVEL_NAMES.get(record.levelno, record.levelname))
+            fields = self._fields[cache_key] = (
+                f'","level":{level},"logger":{encode_basestring(record.name)},"message":'
+            )
+        line = f'{{"time":"{self.formatTime(record)}{fields}{encode_basestring(record.getMessage())}{self._static}'
+        extra = record.__dict__.keys() - _RECORD_ATTRIBUTES
+        if not (extra or record.exc_info or record.exc_text or record.stack_info):
+            return f"{line}}}"
+
+        parts = [line]
+        reserved = self._reserved
+        if extra.isdisjoint(reserved):
+            parts.extend(
+                f",{encode_basestring(key)}:{_encode(value)}" for key, value in record.__dict__.items() if key in extra
+            )
+        else:
+            taken = reserved | extra
+            parts.extend(
+                f",{encode_basestring(_unique_key(key, taken) if key in reserved else key)}:{_encode(value)}"
+                for key, value in record.__dict__.items() if key in extra
+            )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            parts.append(f',"exc_info":{encode_basestring(record.exc_text)}')
+        if record.stack_info:
+            parts.append(f',"stack_info":{encode_basestring(self.formatStack(record.stack_info))}')
+        parts.append("}")
+        return "".join(parts)
+
+
+def _unique_key(key: str, taken: frozenset[str] | set[str]) -> str:
+    """Prefix a key with ``extra_`` until it differs from the taken keys."""
+    while key in taken:
+        key = f"extra_{key}"
+    return key
+
+
+def _encode(value: Any) -> str:
+    """Encode a value as JSON, falling back to its string representation."""
+    if type(value) is str:
+        return encode_basestring(value)
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for the bounded queue of a listener, which either blocks or drops the oldest record when the
+    queue is full. Once the listener is stopped, records are written in the calling thread instead.
+    """
+
+    def __init__(self, listener: _BatchingListener, overflow: Literal["block", "drop_oldest"] = "block") -> None:
+        if overflow not in ("block", "drop_oldest"):
+            raise ValueError(f"Invalid overflow policy {overflow!r}, expected 'block' or 'drop_oldest'.")
+        super().__init__(listener.queue)
+        self.listener = listener
+        self.overflow = overflow
+        self.dropped = 0
+
+    def emit(self, record):
+        # Called with the handler lock held, so the listener cannot be stopped in between
+        if self.listener.running:
+            super().emit(record)
+        else:
+            self.listener.handler.handle(record)
+
+    def stop(self) -> None:
+        """Write all queued records and stop the listener. Records logged afterwards are written directly."""
+        with self.lock:
+            self.listener.stop()
+
+    def prepare(self, record):
+        # The record stays in this process, so only the message is merged and the formatting is left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class _BatchingListener:
+    """Background thread formatting queued records and writing them to a stream handler in batches."""
+
+    _sentinel = None
+
+    def __init__(self, handler: logging.StreamHandler, record_queue: queue.Queue, max_batch: int = 512) -> None:
+        self.handler = handler
+        self.queue = record_queue
+        self.max_batch = max_batch
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the listener thread."""
+        self._thread = threading.Thread(target=self._run, name="popi_lib-log-listener", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        """Whether the listener thread is running."""
+        return self._thread is not None
+
+    def stop(self) -> None:
+        """Write all queued records and stop the listener thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._sentinel in batch:
+                running = False
+            self._write(record for record in batch if record is not self._sentinel)
+
+    def _write(self, records) -> None:
+        """Format the records and write them to the stream at once."""
+        handler = self.handler
+        lines = []
+        for record in records:
+            if record.levelno < handler.level:
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+        try:
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            handler.handleError(record)
+
+
 class CustomLogger(logging.Logger):
-    def __init__(self, name: str = __name__, debug: bool = False) -> None:
+    """
+    A logger writing colored records, or JSON lines in structured mode, to the standard error stream.
+
+    :param name: Name of the logger.
+    :param debug: Whether to log debug messages.
+    :param async_mode: Whether to hand records to a background thread instead of writing them in the calling thread.
+    :param queue_size: Maximum number of records waiting to be written in async mode.
+    :param overflow: What to do when the queue is full in async mode: "block" waits for free space, "drop_oldest"
+        discards the oldest queued record.
+    :param structured: Whether to write each record as a JSON object using a JsonFormatter. If None, structured
+        mode is used if the ``POPI_LIB_LOG_FORMAT`` environment variable is "json".
+    """
+
+    def __init__(
+        self,
+        name: str = __name__,
+        debug: bool = False,
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        overflow: Literal["block", "drop_oldest"] = "block",
+        structured: Optional[bool] = None,
+    ) -> None:
         super().__init__(name)
-        handler = logging.StreamHandler()
-        handler.setFormatter(CustomFormatter())
-        self.addHandler(handler)
+        self._handler = _build_handler(async_mode, queue_size, overflow, structured)
+        self.addHandler(self._handler)
         self.setLevel(logging.DEBUG if debug else logging.INFO)
 
+    def shutdown(self) -> None:
+        """
+        Write all queued records and stop the background thread. Records logged afterwards are written in the
+        calling thread. Does nothing if not in async mode.
+        """
+        if isinstance(self._handler, _BoundedQueueHandler):
+            self._handler.stop()
+
+
+def _build_handler(
+    async_mode: bool = False,
+    queue_size: int = 10000,
+    overflow: Literal["block", "drop_oldest"] = "block",
+    structured: Optional[bool] = None,
+) -> logging.Handler:
+    """
+    Create a handler writing colored records or JSON lines to the standard error stream.
+
+    :param async_mode: Whether to hand records to a background thread instead of writing them in the calling thread.
+    :param queue_size: Maximum number of records waiting to be written in async mode.
+    :param overflow: What to do when the queue is full in async mode.
+    :param structured: Whether to write JSON lines. If None, it is read from the environment.
+    :return: The handler. In async mode, a queue handler whose listener is already started.
+    """
+    if structured is None:
+        structured = os.environ.get(LOG_FORMAT_ENV_VAR, "").strip().lower() == "json"
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if structured else CustomFormatter())
+    if not async_mode:
+        return handler
+    listener = _BatchingListener(handler, queue.Queue(max(1, queue_size)))
+    queue_handler = _BoundedQueueHandler(listener, overflow)
+    listener.start()
+    atexit.register(queue_handler.stop)
+    return queue_handler
+
+
+LIBRARY_LOGGER_NAME = "popi_lib"
+LOG_LEVEL_ENV_VAR = "POPI_LIB_LOG_LEVEL"
+LOG_FORMAT_ENV_VAR = "POPI_LIB_LOG_FORMAT"
+
+_library_lock = threading.Lock()
+_library_handler: Optional[logging.Handler] = None
+_library_checked = False
+
+
+def _env_level() -> int:
+    """Read the log level from the environment, falling back to INFO if it is missing or invalid."""
+    value = os.environ.get(LOG_LEVEL_ENV_VAR, "").strip().upper()
+    if not value:
+        return logging.INFO
+    level = int(value) if value.isdigit() else logging.getLevelName(value)
+    if not isinstance(level, int):
+        warnings.warn(f"Invalid {LOG_LEVEL_ENV_VAR} value {value!r}, using INFO.", RuntimeWarning, stacklevel=2)
+        return logging.INFO
+    return level
+
+
+def configure_logging(
+    level: Optional[int | str] = None,
+    async_mode: bool = False,
+    queue_size: int = 10000,
+    overflow: Literal["block", "drop_oldest"] = "block",
+    structured: Optional[bool] = None,
+) -> logging.Logger:
+    """
+    Configure the logger shared by all classes of the library.
+
+    All class loggers are children of the ``popi_lib`` logger and write through its single handler.
+
+    :param level: The log level. If None, it is read from the ``POPI_LIB_LOG_LEVEL`` environment variable,
+        defaulting to INFO if it is not set or invalid.
+    :param async_mode: Whether to hand records to a background thread instead of writing them in the calling thread.
+    :param queue_size: Maximum number of records waiting to be written in async mode.
+    :param overflow: What to do when the queue is full in async mode: "block" waits for free space, "drop_oldest"
+        discards the oldest queued record.
+    :param structured: Whether to write each record as a JSON object using a JsonFormatter. If None, structured
+        mode is used if the ``POPI_LIB_LOG_FORMAT`` environment variable is "json".
+    :return: The library logger.
+    """
+    global _library_handler
+    if level is None:
+        level = _env_level()
+    library_logger = logging.getLogger(LIBRARY_LOGGER_NAME)
+    with _library_lock:
+        if _library_handler is not None:
+            library_logger.removeHandler(_library_handler)
+            if isinstance(_library_handler, _BoundedQueueHandler):
+                _library_handler.stop()
+        _library_handler = _build_handler(async_mode, queue_size, overflow, structured)
+        library_logger.addHandler(_library_handler)
+        library_logger.setLevel(level)
+        library_logger.propagate = False
+    return library_logger
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """
+    Get the library logger or one of its children.
+
+    On first use, the library logger is configured with ``configure_logging`` only if the application has not set
+    up logging: neither the ``popi_lib`` logger nor the root logger has a handler, and no level was set on the
+    ``popi_lib`` logger. Otherwise the records propagate to the handlers of the application unchanged.
+
+    :param name: Name of the child logger, usually a class name. If None, the library logger itself is returned.
+    :return: The logger.
+    """
+    global _library_checked
+    if not _library_checked:
+        with _library_lock:
+            library_logger = logging.getLogger(LIBRARY_LOGGER_NAME)
+            unconfigured = (
+                _library_handler is None and not library_logger.handlers and not logging.getLogger().handlers
+                and library_logger.level == logging.NOTSET
+            )
+            _library_checked = True
+        if unconfigured:
+            configure_logging()
+    return logging.getLogger(f"{LIBRARY_LOGGER_NAME}.{name}" if name else LIBRARY_LOGGER_NAME)
+
 
 if __name__ == "__main__":
     logger = CustomLogger(debug=True)
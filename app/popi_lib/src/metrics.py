@@ -0,0 +1,169 @@
+from __future__ import annotations
+import threading
+from time import perf_counter
+from typing import Any, Callable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class RenderEvent(NamedTuple):
+    """
+    Timing of a single measured call, passed to the hooks of a Metrics object.
+
+    :param name: Name of the measured operation, for example "frame.build" or "progressbar.display".
+    :param duration: Duration of the call in seconds.
+    :param source: The object whose method was measured.
+    """
+
+    name: str
+    duration: float
+    source: Any
+
+
+class Metrics:
+    """
+    Counters and timings of the rendering, writing and log formatting done by the library.
+
+    Collection is disabled by default. Instrumented code only checks the ``enabled`` attribute while it is
+    disabled, so the overhead is a single attribute lookup per call.
+
+    Counters:
+        - ``frame.redraws``, ``frame.skipped_redraws``: Frame prints that wrote output or found nothing to write.
+        - ``progressbar.redraws``, ``progressbar.skipped_redraws``: Progress bar redraws and throttled or unchanged
+          ones.
+        - ``group.redraws``, ``group.skipped_redraws``: The same for progress groups and asynchronous renderers.
+        - ``sink.writes``, ``sink.bytes_written``: Writes to sinks and their UTF-8 encoded size.
+
+    Timings, in seconds: ``frame.build``, ``progressbar.display`` and ``logger.format``.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._counters: dict[str, int] = {}
+        self._timings: dict[str, list[float]] = {}
+        self._hooks: list[Callable[[RenderEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(enabled={self.enabled}, hooks={len(self._hooks)})"
+
+    def enable(self) -> Metrics:
+        """
+        Start collecting counters and timings.
+
+        :return: The updated Metrics object.
+        """
+        self.enabled = True
+        return self
+
+    def disable(self) -> Metrics:
+        """
+        Stop collecting counters and timings. The values collected so far are kept.
+
+        :return: The updated Metrics object.
+        """
+        self.enabled = False
+        return self
+
+    def reset(self) -> Metrics:
+        """
+        Discard all collected counters and timings.
+
+        :return: The updated Metrics object.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+        return self
+
+    def add_hook(self, hook: Callable[[RenderEvent], None]) -> Metrics:
+        """
+        Register a function called with a RenderEvent after every measured call while collection is enabled.
+
+        Hooks run in the thread that made the call, so they should return quickly.
+
+        :param hook: The function to call.
+        :return: The updated Metrics object.
+        """
+        with self._lock:
+            self._hooks = [*self._hooks, hook]
+        return self
+
+    def remove_hook(self, hook: Callable[[RenderEvent], None]) -> Metrics:
+        """
+        Unregister a hook.
+
+        :param hook: The function to unregister.
+        :return: The updated Metrics object.
+        """
+        with self._lock:
+            self._hooks = [registered for registered in self._hooks if registered != hook]
+        return self
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Increase a counter.
+
+        :param name: Name of the counter.
+        :param amount: Amount to add.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record(self, name: str, duration: float, source: Any = None) -> None:
+        """
+        Record the duration of a call and pass it to the hooks.
+
+        :param name: Name of the measured operation.
+        :param duration: Duration of the call in seconds.
+        :param source: The object whose method was measured.
+        """
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                self._timings[name] = [1, duration, duration]
+            else:
+                timing[0] += 1
+                timing[1] += duration
+                if duration > timing[2]:
+                    timing[2] = duration
+            hooks = self._hooks
+        if hooks:
+            event = RenderEvent(name, duration, source)
+            for hook in hooks:
+                hook(event)
+
+    def timed(self, name: str, source: Any, function: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Call a function and record its duration.
+
+        :param name: Name of the measured operation.
+        :param source: The object whose method is measured.
+        :param function: The function to call.
+        :return: The return value of the function.
+        """
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.record(name, perf_counter() - start, source)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Get a copy of the collected values, for example to export them to a metrics system.
+
+        :return: Dictionary with the counters, the timings with their call count, total, mean and maximum duration
+            in seconds, and the statistics of the shared render cache.
+        """
+        from .render_cache import render_cache
+
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {"count": int(count), "total": total, "mean": total / count, "max": maximum}
+                for name, (count, total, maximum) in self._timings.items()
+            }
+        return {"enabled": self.enabled, "counters": counters, "timings": timings, "render_cache": render_cache.info()}
+
+
+metrics = Metrics()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+import threading
+from abc import abstractmethod
+from time import perf_counter
+from typing import Iterable, Optional, TextIO, Union
+
+from .core import Base, _AbstractRegistrar
+from .escape_codes import move_cursor
+from .metrics import metrics
+from .progressbar import ProgressBar
+from .sinks import Sink, as_sink
+
+
+class _RowRenderer(Base, metaclass=_AbstractRegistrar):
+    """
+    Base of renderers redrawing a list of rows in place, or writing plain-text snapshots of them to a sink that is
+    not interactive.
+
+    :param refresh_rate: Number of refreshes per second while the renderer is running.
+    :param sink: Where to write the rows: a Sink, a text stream or a file descriptor. If None, the standard output
+        is used.
+    """
+
+    def __init__(self, refresh_rate: float = 10.0, sink: Union[Sink, TextIO, int, None] = None) -> None:
+        self.refresh_rate = refresh_rate
+        self.sink = as_sink(sink)
+        self._rendered: list[str] = []
+        self._snapshot: Optional[list[str]] = None
+        self._snapshot_time: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def _compose(self, force: bool = False) -> str:
+        """
+        Build the output redrawing the rows that changed since the last refresh, or a snapshot of all rows if the
+        sink is not interactive.
+
+        :param force: Whether to build a snapshot even if the snapshot interval has not passed.
+        :return: The text to write, or an empty string if nothing needs to be written.
+        """
+        with self._lock:
+            if self.sink.interactive:
+                return self._render_update(self._rows())
+            now = perf_counter()
+            interval_passed = self._snapshot_time is None or now - self._snapshot_time >= self.sink.snapshot_interval
+            if not force and not interval_passed:
+                return ""
+            rows = self._rows(plain=True)
+            if rows == self._snapshot:
+                return ""
+            self._snapshot = rows
+            self._snapshot_time = now
+            return "\n".join(rows) + "\n"
+
+    @abstractmethod
+    def _rows(self, plain: bool = False) -> list[str]:
+        """
+        Render all rows.
+
+        :param plain: Whether to leave out all escape codes.
+        :return: List of rows.
+        """
+
+    def _render_update(self, rows: list[str]) -> str:
+        """
+        Build the output that turns the previously rendered rows into the given rows.
+
+        The cursor is expected below the last rendered row and is left below the new last row.
+
+        :param rows: The new rows.
+        :return: The escape codes and text to write.
+        """
+        previous = self._rendered
+        output = []
+        cursor = len(previous)
+        for index, (row, old_row) in enumerate(zip(rows, previous)):
+            if row != old_row:
+                output.append(f"{move_cursor(cursor, index)}\033[K{row}")
+                cursor = index
+
+        if len(rows) > len(previous):
+            output.append(move_cursor(cursor, len(previous)))
+            output.extend(f"\033[K{row}\n" for row in rows[len(previous):])
+        elif len(rows) < len(previous):
+            output.append(f"{move_cursor(cursor, len(rows))}\033[J")
+        else:
+            output.append(move_cursor(cursor, len(rows)))
+
+        self._rendered = rows
+        return "".join(output)
+
+
+class ProgressGroup(_RowRenderer):
+    """
+    A group of progress bars displayed on separate rows and redrawn together.
+
+    Each refresh composes all rows into one buffer and writes it at once. The bars of a group should not be
+    displayed on their own; update them with ``add`` and ``set`` and let the group draw them.
+
+    :param bars: The progress bars to display.
+    :param refresh_rate: Number of refreshes per second while the group is running.
+    :param sink: Where to write the bars: a Sink, a text stream or a file descriptor. If None, the standard output
+        is used. If the sink is not interactive, plain-text snapshots of all rows are written instead, at most once
+        per snapshot interval of the sink.
+    """
+
+    def __init__(
+        self,
+        bars: Optional[Iterable[ProgressBar]] = None,
+        refresh_rate: float = 10.0,
+        sink: Union[Sink, TextIO, int, None] = None,
+    ) -> None:
+        super().__init__(refresh_rate, sink)
+        self.bars: list[ProgressBar] = list(bars) if bars is not None else []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> ProgressGroup:
+        """Start refreshing the group in the background."""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop refreshing the group and draw its final state."""
+        self.stop()
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(bars={self.bars}, refresh_rate={self.refresh_rate})"
+
+    def add(self, bar: ProgressBar) -> ProgressGroup:
+        """
+        Add a progress bar below the others.
+
+        :param bar: The progress bar to add.
+        :return: The updated ProgressGroup object.
+        """
+        with self._lock:
+            self.bars.append(bar)
+        return self
+
+    def remove(self, bar: ProgressBar) -> ProgressGroup:
+        """
+        Remove a progress bar. Its row is removed on the next refresh.
+
+        :param bar: The progress bar to remove.
+        :return: The updated ProgressGroup object.
+        """
+        with self._lock:
+            self.bars.remove(bar)
+        return self
+
+    def refresh(self, force: bool = False) -> ProgressGroup:
+        """
+        Redraw the rows of the bars that changed since the last refresh, in a single write.
+
+        :param force: Whether to write a snapshot even if the snapshot interval of a non-interactive sink has not
+            passed.
+        :return: The updated ProgressGroup object.
+        """
+        with self._lock:
+            output = self._compose(force)
+            if output:
+                self.sink.write(output)
+        if metrics.enabled:
+            metrics.count("group.redraws" if output else "group.skipped_redraws")
+        return self
+
+    def start(self) -> ProgressGroup:
+        """
+        Draw the group and start refreshing it in a background thread.
+
+        :return: The updated ProgressGroup object.
+        """
+        if self._thread is not None:
+            return self
+        self.refresh()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.__class__.__name__}-refresh", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> ProgressGroup:
+        """
+        Stop the background thread and draw the final state of the bars.
+
+        :return: The updated ProgressGroup object.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        return self.refresh(force=True)
+
+    def _run(self) -> None:
+        """Refresh the group at the configured rate until stopped."""
+        while not self._stop_event.wait(1 / self.refresh_rate):
+            self.refresh()
+
+    def _rows(self, plain: bool = False) -> list[str]:
+        """
+        Render the rows of all bars.
+
+        :param plain: Whether to leave out all escape codes.
+        :return: List of rows.
+        """
+        colors = self.sink.colors
+        return [bar.render(plain, colors) for bar in self.bars]
@@ -1,7 +1,48 @@
-import sys
-from typing import Optional
+from __future__ import annotations
+from itertools import chain, islice
+from operator import length_hint
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO, TypeVar, Union
 
 from .core import Base
+from .escape_codes import strip_tags, text2escape
+from .metrics import metrics
+from .sinks import Sink, as_sink
+from .template import MarkupTemplate, RenderedMarkup
+
+if TYPE_CHECKING:
+    from .counters import ProcessCounter, ThreadCounter
+
+T = TypeVar("T")
+
+RATE_SAMPLE_INTERVAL = 0.1
+BYTE_UNITS = ("B", "KiB", "MiB", "GiB", "TiB", "PiB")
+
+SMOOTH_FILL = "█"
+SMOOTH_PARTIALS = ("", "▏", "▎", "▍", "▌", "▋", "▊", "▉")
+
+
+def _next_batch(batch: int, elapsed: float, interval: float) -> int:
+    """Scale a batch size so that the next batch takes about one interval, growing it at most tenfold at once."""
+    if elapsed <= 0:
+        return batch * 10
+    return max(1, min(batch * 10, int(batch * interval / elapsed)))
+
+
+class _StyleAttribute:
+    """Attribute that affects the drawn bar and discards the precomputed bar table when changed."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self.name] = value
+        instance.__dict__["_bar_table"] = None
 
 
 class ProgressBar(Base):
@@ -13,8 +54,9 @@ class ProgressBar(Base):
     :param initial_progress: The initial progress value.
     :param fill: The character used to fill the progress bar.
     :param empty: The character used to represent the empty space in the progress bar.
-    :param prefix: Text before the progress bar.
-    :param suffix: Text after the progress bar.
+    :param prefix: Text before the progress bar. A MarkupTemplate is filled in on every redraw with the fields
+        ``progress``, ``total``, ``percent``, ``rate`` and ``eta``, and the fields set with ``set_fields``.
+    :param suffix: Text after the progress bar. Accepts a MarkupTemplate like the prefix.
     :param start_fill: The character at the start of the filled portion.
     :param end_fill: The character at the end of the filled portion.
     :param start_empty: The character at the start of the empty portion.
@@ -23,8 +65,34 @@ class ProgressBar(Base):
     :param show_count: Whether to display the progress count.
     :param show_count_leading_zero: Whether to display leading zeros in the progress count.
     :param percentage_floating_digits: Number of decimal places in the percentage.
+    :param min_interval: Minimum number of seconds between two redraws.
+    :param min_delta: Minimum change in progress between two redraws.
+    :param smooth: Whether to draw the bar with Unicode eighth-block glyphs, giving eight steps per character.
+        The fill and end characters are not used in this mode.
+    :param counter: A shared counter holding the progress. ``add`` and ``set`` then only update the counter, which
+        is safe from several threads or processes, and the bar reads it whenever it is drawn. Draw such a bar from
+        a single thread, for example with a ``ProgressGroup``.
+    :param show_rate: Whether to display the throughput.
+    :param show_eta: Whether to display the estimated time remaining.
+    :param unit: The unit of the progress. With "B", the throughput is displayed in bytes per second with binary
+        prefixes.
+    :param smoothing: Weight of the latest sample in the moving average of the throughput, between 0 and 1, per
+        sample interval of 0.1 seconds. The throughput is sampled when the progress changes and on every redraw.
+    :param track_rate: Whether to measure the throughput even if it is not displayed.
+    :param sink: Where to write the bar: a Sink, a text stream or a file descriptor. If None, the standard output
+        is used. If the sink is not interactive, the bar is written as a new line at most once per snapshot
+        interval of the sink, and when it is complete.
     """
 
+    length = _StyleAttribute()
+    fill = _StyleAttribute()
+    empty = _StyleAttribute()
+    start_fill = _StyleAttribute()
+    end_fill = _StyleAttribute()
+    start_empty = _StyleAttribute()
+    end_empty = _StyleAttribute()
+    smooth = _StyleAttribute()
+
     def __init__(
         self,
         total: int,
@@ -32,8 +100,8 @@ class ProgressBar(Base):
         initial_progress: int = 0,
         fill: str = '#',
         empty: str = '-',
-        prefix: str = '',
-        suffix: str = '',
+        prefix: str | MarkupTemplate = '',
+        suffix: str | MarkupTemplate = '',
         start_fill: Optional[str] = None,
         end_fill: Optional[str] = None,
         start_empty: Optional[str] = None,
@@ -42,6 +110,16 @@ class ProgressBar(Base):
         show_count: bool = True,
         show_count_leading_zero: bool = False,
         percentage_floating_digits: int = 2,
+        min_interval: float = 0.0,
+        min_delta: int = 0,
+        smooth: bool = False,
+        counter: Optional[Union[ThreadCounter, ProcessCounter]] = None,
+        show_rate: bool = False,
+        show_eta: bool = False,
+        unit: str = "it",
+        smoothing: float = 0.3,
+        track_rate: bool = False,
+        sink: Union[Sink, TextIO, int, None] = None,
     ) -> None:
         self.total = max(1, total)  # Avoid division by zero
         self.length = max(1, length)  # Length should be at least 1
@@ -58,6 +136,27 @@ class ProgressBar(Base):
         self.show_count = show_count
         self.show_count_leading_zero = show_count_leading_zero
         self.percentage_floating_digits = max(0, percentage_floating_digits)
+        self.min_interval = max(0.0, min_interval)
+        self.min_delta = max(0, min_delta)
+        self.smooth = smooth
+        self.counter = counter
+        if counter is not None:
+            counter.set(self.progress)
+        self.show_rate = show_rate
+        self.show_eta = show_eta
+        self.unit = unit
+        self.smoothing = max(0.0, min(smoothing, 1.0))
+        self.track_rate = track_rate or show_rate or show_eta
+        self._rate: Optional[float] = None
+        self._rate_progress = self.progress
+        self._rate_time = perf_counter()
+        self.sink = as_sink(sink)
+        self.fields: dict = {}
+        self._renderer = None
+        self._snapshot_time: Optional[float] = None
+        self._last_output: Optional[str] = None
+        self._last_progress = 0
+        self._last_time = 0.0
 
     def __len__(self) -> int:
         return self.total
@@ -71,7 +170,9 @@ class ProgressBar(Base):
             f"start_empty='{self.start_empty}', end_empty='{self.end_empty}', "
             f"show_percent={self.show_percent}, show_count={self.show_count}, "
             f"show_count_leading_zero={self.show_count_leading_zero}, "
-            f"percentage_floating_digits={self.percentage_floating_digits})"
+            f"percentage_floating_digits={self.percentage_floating_digits}, "
+            f"min_interval={self.min_interval}, min_delta={self.min_delta}, smooth={self.smooth}, "
+            f"show_rate={self.show_rate}, show_eta={self.show_eta}, unit='{self.unit}')"
         )
 
     def __eq__(self, other) -> bool:
@@ -92,33 +193,303 @@ class ProgressBar(Base):
             self.show_percent == other.show_percent and
             self.show_count == other.show_count and
             self.show_count_leading_zero == other.show_count_leading_zero and
-            self.percentage_floating_digits == other.percentage_floating_digits
+            self.percentage_floating_digits == other.percentage_floating_digits and
+            self.smooth == other.smooth and
+            self.show_rate == other.show_rate and
+            self.show_eta == other.show_eta and
+            self.unit == other.unit
         )
 
-    def display(self) -> 'ProgressBar':
+    async def __aenter__(self) -> ProgressBar:
+        """Start redrawing the bar from an asyncio task, so that coroutines only need to update the progress."""
+        from .aio import AsyncRenderer
+        self._renderer = AsyncRenderer([self], sink=self.sink)
+        await self._renderer.astart()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop the asyncio task after drawing the final state of the bar."""
+        await self._renderer.astop()
+        self._renderer = None
+
+    @property
+    def rate(self) -> Optional[float]:
+        """The smoothed throughput in units per second, or None if it was not measured yet."""
+        return self._rate
+
+    @property
+    def eta(self) -> Optional[float]:
+        """The estimated number of seconds remaining, or None if the throughput is unknown."""
+        if self.progress >= self.total:
+            return 0.0
+        if not self._rate:
+            return None
+        return (self.total - self.progress) / self._rate
+
+    def display(self, force: bool = False) -> 'ProgressBar':
         """
         Display the progress bar in the console.
+
+        The bar is not redrawn while the progress changed by less than ``min_delta`` or less than ``min_interval``
+        seconds passed since the last redraw, unless the progress reached the total. A bar that would look exactly
+        like the one already displayed is not written again.
+
+        :param force: Whether to redraw the bar regardless of the throttling.
+        """
+        if not metrics.enabled:
+            self._display(force)
+            return self
+        start = perf_counter()
+        written = self._display(force)
+        metrics.record("progressbar.display", perf_counter() - start, self)
+        metrics.count("progressbar.redraws" if written else "progressbar.skipped_redraws")
+        return self
+
+    def _display(self, force: bool) -> bool:
+        """
+        Redraw the bar unless it is throttled or unchanged.
+
+        :param force: Whether to redraw the bar regardless of the throttling.
+        :return: Whether the bar was written.
+        """
+        if self.counter is not None:
+            self.sync()
+        if not force and self._last_output is not None and self.progress < self.total:
+            if self.min_delta and abs(self.progress - self._last_progress) < self.min_delta:
+                return False
+            if self.min_interval and perf_counter() - self._last_time < self.min_interval:
+                return False
+
+        output = self.render(plain=not self.sink.interactive)
+        if not force and output == self._last_output:
+            return False
+        if self.sink.interactive:
+            self.sink.write(f"\r{output}\033[K")
+        else:
+            now = perf_counter()
+            if (
+                not force and self.progress < self.total and self._snapshot_time is not None
+                and now - self._snapshot_time < self.sink.snapshot_interval
+            ):
+                return False
+            self.sink.write(f"{output}\n")
+            self._snapshot_time = now
+        self._last_output = output
+        self._last_progress = self.progress
+        if self.min_interval:
+            self._last_time = perf_counter()
+        return True
+
+    def render(self, plain: bool = False, colors: Optional[bool] = None) -> str:
+        """
+        Build the progress bar line without writing it.
+
+        :param plain: Whether to leave out the escape codes of prefix and suffix templates.
+        :param colors: Whether the prefix and suffix templates get escape codes for colors and styles. If None, the
+            color support of the sink of the bar is used.
+        :return: The progress bar as it would be displayed.
         """
+        if self.counter is not None:
+            self.sync()
+        elif self.track_rate:
+            # Sample on every redraw as well, so that the throughput decays while the progress stalls
+            self._sample_rate()
         percent = self.progress / self.total
-        fill_length = int(self.length * percent)
-        empty_length = self.length - fill_length
-        start_bar = self.start_fill if fill_length > 0 else self.start_empty
-        middle_fill = self.fill * max(0, fill_length - 1)
-        middle_empty = self.empty * max(0, empty_length - 1)
-        end_bar = self.end_empty if empty_length > 0 else self.end_fill
-        bar = start_bar + middle_fill + middle_empty + end_bar
+        bar_table = self._bar_table or self._build_bar_table()
+        bar = bar_table[int((len(bar_table) - 1) * self.progress // self.total)]
 
         percent_display = f"{percent * 100:.{self.percentage_floating_digits}f}%" if self.show_percent else ""
         count_display = f"({self.progress:0{len(str(self.total))}d}/{self.total}) " if self.show_count else ""
+        rate_display = f" {self._format_rate()}" if self.show_rate else ""
+        eta_display = f" ETA {self._format_eta()}" if self.show_eta else ""
+
+        prefix = self.prefix
+        suffix = self.suffix
+        if not (type(prefix) is str and type(suffix) is str):
+            if colors is None:
+                colors = self.sink.colors
+            prefix = self._fill_in(prefix, percent, plain, colors)
+            suffix = self._fill_in(suffix, percent, plain, colors)
+        return f"{prefix}{bar}{suffix} {count_display}{percent_display}{rate_display}{eta_display}"
+
+    def set_fields(self, **values) -> ProgressBar:
+        """
+        Set values of the fields of the prefix and suffix templates, in addition to the built-in fields.
 
-        sys.stdout.write(f"\r{self.prefix}{bar}{self.suffix} {count_display}{percent_display}")
-        sys.stdout.flush()
+        :param values: The values of the fields.
+        :return: The updated ProgressBar object.
+        """
+        self.fields.update(values)
         return self
 
+    def _fill_in(self, text: str | MarkupTemplate, percent: float, plain: bool, colors: bool) -> str:
+        """Fill in a prefix or suffix template, or return the translation of already filled-in markup."""
+        if isinstance(text, MarkupTemplate):
+            text = text._format(
+                {
+                    **self.fields, "progress": self.progress, "total": self.total, "percent": percent * 100,
+                    "rate": self._format_rate(), "eta": self._format_eta(),
+                },
+                colors,
+            )
+        if isinstance(text, RenderedMarkup):
+            if plain:
+                return strip_tags(text)
+            return text.ansi if text.colors == colors else text2escape(text, colors)
+        return text
+
+    def _format_rate(self) -> str:
+        """Format the throughput for display."""
+        if self._rate is None:
+            return f"-- {self.unit}/s"
+        if self.unit != "B":
+            return f"{self._rate:.2f} {self.unit}/s"
+        rate = self._rate
+        for byte_unit in BYTE_UNITS[:-1]:
+            if abs(rate) < 1024:
+                return f"{rate:.2f} {byte_unit}/s"
+            rate /= 1024
+        return f"{rate:.2f} {BYTE_UNITS[-1]}/s"
+
+    def _format_eta(self) -> str:
+        """Format the estimated time remaining for display."""
+        eta = self.eta
+        if eta is None:
+            return "--:--"
+        minutes, seconds = divmod(int(eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+    @classmethod
+    def wrap(
+        cls, iterable: Iterable[T], total: Optional[int] = None, *args, refresh_rate: float = 10.0, **kwargs
+    ) -> Iterator[T]:
+        """
+        Iterate over an iterable while displaying a progress bar.
+
+        :param iterable: The iterable to iterate over.
+        :param total: The number of items. If None, it is taken from ``len(iterable)``.
+        :param refresh_rate: Target number of redraws per second.
+        :param args: Further positional arguments for the progress bar.
+        :param kwargs: Further keyword arguments for the progress bar.
+        :return: An iterator over the items of the iterable.
+        """
+        if total is None:
+            if not hasattr(iterable, "__len__"):
+                raise TypeError(f"Cannot infer the total of a {type(iterable).__name__!r} object, pass total instead.")
+            total = len(iterable)
+        return cls(total, *args, **kwargs).track(iterable, refresh_rate)
+
+    def track(self, iterable: Iterable[T], refresh_rate: float = 10.0) -> Iterator[T]:
+        """
+        Iterate over an iterable, adding one to the progress per item.
+
+        The bar is only updated every few items. The number of items between two updates is adapted to the time
+        they take, so that the bar is redrawn about ``refresh_rate`` times per second. Iterables whose iterator
+        reports the number of remaining items, such as lists, tuples and ranges, are passed through in slices, so
+        iterating over them costs about as much as a bare loop. If the iteration stops early, the progress counts
+        the items actually consumed.
+
+        :param iterable: The iterable to iterate over.
+        :param refresh_rate: Target number of redraws per second.
+        :return: An iterator over the items of the iterable.
+        """
+        if hasattr(iterable, "__len__"):
+            size = len(iterable)
+            iterator = iter(iterable)
+            # The remaining length tells how many items of a slice were consumed if the caller stops early
+            if length_hint(iterator, -1) == size:
+                return chain.from_iterable(self._track_slices(iterator, size, 1 / refresh_rate))
+            return self._track_items(iterator, 1 / refresh_rate)
+        return self._track_items(iterable, 1 / refresh_rate)
+
+    def _track_slices(self, iterator: Iterator[T], size: int, interval: float) -> Iterator[Iterator[T]]:
+        """
+        Split an iterator of known size into slices, updating the bar whenever a slice was consumed.
+
+        :param iterator: The iterator to split. It must report the number of remaining items with
+            ``__length_hint__``.
+        :param size: The number of items of the iterator.
+        :param interval: Target number of seconds between two updates.
+        :return: An iterator over the slices.
+        """
+        start = self.progress
+        done = 0
+        batch = 1
+        self.display()
+        last_time = perf_counter()
+        try:
+            while done < size:
+                batch = min(batch, size - done)
+                yield islice(iterator, batch)
+                done += batch
+                self.set(start + done).display()
+                now = perf_counter()
+                batch = _next_batch(batch, now - last_time, interval)
+                last_time = now
+        finally:
+            self.set(start + size - length_hint(iterator)).display()
+
+    def _track_items(self, iterable: Iterable[T], interval: float) -> Iterator[T]:
+        """
+        Iterate over an iterable of unknown size, updating the bar every few items.
+
+        :param iterable: The iterable to iterate over.
+        :param interval: Target number of seconds between two updates.
+        :return: An iterator over the items of the iterable.
+        """
+        start = self.progress
+        count = 0
+        batch = 1
+        next_update = 1
+        self.display()
+        last_time = perf_counter()
+        try:
+            for item in iterable:
+                # Counted before yielding, so that an item is included if the caller stops right after it
+                count += 1
+                yield item
+                if count >= next_update:
+                    self.set(start + count).display()
+                    now = perf_counter()
+                    batch = _next_batch(batch, now - last_time, interval)
+                    last_time = now
+                    next_update = count + batch
+        finally:
+            self.set(start + count).display()
+
+    def _build_bar_table(self) -> list[str]:
+        """
+        Precompute the bar for every possible fill step.
+
+        :return: List of bars, indexed by the number of filled steps.
+        """
+        if self.smooth:
+            bar_table = []
+            for step in range(self.length * 8 + 1):
+                full, partial = divmod(step, 8)
+                partial_glyph = SMOOTH_PARTIALS[partial]
+                empty_length = self.length - full - len(partial_glyph)
+                bar_table.append(SMOOTH_FILL * full + partial_glyph + self.empty * empty_length)
+        else:
+            bar_table = []
+            for fill_length in range(self.length + 1):
+                empty_length = self.length - fill_length
+                start_bar = self.start_fill if fill_length > 0 else self.start_empty
+                middle_fill = self.fill * max(0, fill_length - 1)
+                middle_empty = self.empty * max(0, empty_length - 1)
+                end_bar = self.end_empty if empty_length > 0 else self.end_fill
+                bar_table.append(start_bar + middle_fill + middle_empty + end_bar)
+        self._bar_table = bar_table
+        return bar_table
+
     def add(self, amount: int) -> 'ProgressBar':
         """
         Increase the progress by a specified amount.
         """
+        if self.counter is not None:
+            self.counter.add(amount)
+            return self
         self.set(self.progress + amount)
         return self
 
@@ -126,9 +497,43 @@ class ProgressBar(Base):
         """
         Set the progress to a specific value.
         """
+        if self.counter is not None:
+            self.counter.set(amount)
+            return self
         self.progress = max(0, min(amount, self.total))
+        if self.track_rate:
+            self._sample_rate()
         return self
 
+    def sync(self) -> 'ProgressBar':
+        """
+        Update the progress from the shared counter.
+        """
+        self.progress = max(0, min(self.counter.value, self.total))
+        if self.track_rate:
+            self._sample_rate()
+        return self
+
+    def _sample_rate(self) -> None:
+        """
+        Update the moving average of the throughput once enough time passed since the last sample.
+
+        A sample spanning several sample intervals is weighted like that many samples, so a stall of any length
+        counts as one zero-rate sample per interval.
+        """
+        now = perf_counter()
+        elapsed = now - self._rate_time
+        if elapsed < RATE_SAMPLE_INTERVAL:
+            return
+        rate = (self.progress - self._rate_progress) / elapsed
+        if self._rate is None:
+            self._rate = rate
+        else:
+            weight = 1 - (1 - self.smoothing) ** (elapsed / RATE_SAMPLE_INTERVAL)
+            self._rate = weight * rate + (1 - weight) * self._rate
+        self._rate_progress = self.progress
+        self._rate_time = now
+
 
 class Bar(ProgressBar):
     """
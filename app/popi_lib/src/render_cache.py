@@ -0,0 +1,137 @@
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+
+from . import escape_codes
+from .template import RenderedMarkup
+
+
+class RenderCache:
+    """
+    A bounded LRU cache mapping markup strings to their ANSI translation and visible width.
+
+    The cache is cleared automatically when the color support of the terminal changes or when
+    ``escape_code_dict`` is modified.
+
+    :param maxsize: Maximum number of cached entries. A size of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = max(0, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._colors = None
+        self._pattern = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"maxsize={self.maxsize}, size={len(self)}, hits={self.hits}, misses={self.misses})"
+        )
+
+    def get(self, markup: str) -> tuple[str, int]:
+        """
+        Get the ANSI translation and visible width of a markup string.
+
+        :param markup: Text containing markup tags.
+        :return: Tuple of the translated text and the number of visible characters.
+        """
+        colors = escape_codes.terminal_supports_colors()
+        if isinstance(markup, RenderedMarkup) and markup.colors is colors:
+            # Filled-in templates are already translated and would only crowd out reusable entries
+            return markup.ansi, markup.width
+        pattern = escape_codes._current_pattern()
+        with self._lock:
+            if colors is not self._colors or pattern is not self._pattern:
+                self._invalidate(colors, pattern)
+            entry = self._entries.get(markup)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(markup)
+                return entry
+            self.misses += 1
+            entry = _translate(markup, colors)
+            if self.maxsize:
+                self._entries[markup] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return entry
+
+    def render(self, markup: str) -> str:
+        """
+        Translate a markup string to ANSI escape codes.
+
+        :param markup: Text containing markup tags.
+        :return: The translated text.
+        """
+        return self.get(markup)[0]
+
+    def width(self, markup: str) -> int:
+        """
+        Get the number of visible characters of a markup string.
+
+        :param markup: Text containing markup tags.
+        :return: The length of the text without tags.
+        """
+        return self.get(markup)[1]
+
+    def resize(self, maxsize: int) -> RenderCache:
+        """
+        Change the maximum number of entries, evicting the least recently used ones if necessary.
+
+        :param maxsize: New maximum number of entries.
+        :return: The updated RenderCache object.
+        """
+        with self._lock:
+            self.maxsize = max(0, maxsize)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return self
+
+    def clear(self) -> RenderCache:
+        """
+        Remove all entries and reset the hit and miss counters.
+
+        :return: The updated RenderCache object.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        return self
+
+    def info(self) -> dict[str, int]:
+        """Return the cache statistics."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def _invalidate(self, colors: bool, pattern: re.Pattern) -> None:
+        """Drop all entries rendered for a different color support or tag table."""
+        self._entries.clear()
+        self._colors = colors
+        self._pattern = pattern
+
+
+def _translate(markup: str, colors: bool) -> tuple[str, int]:
+    """Translate a markup string and measure its visible width, without caching."""
+    if isinstance(markup, RenderedMarkup) and markup.colors is colors:
+        return markup.ansi, markup.width
+    return escape_codes.text2escape(markup, colors), len(escape_codes.strip_tags(markup))
+
+
+render_cache = RenderCache()
+
+
+def render_markup(markup: str) -> str:
+    """Translate a markup string to ANSI escape codes using the shared render cache."""
+    return render_cache.get(markup)[0]
+
+
+def visible_width(markup: str) -> int:
+    """Get the number of visible characters of a markup string using the shared render cache."""
+    return render_cache.get(markup)[1]
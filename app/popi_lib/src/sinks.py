@@ -0,0 +1,217 @@
+from __future__ import annotations
+import io
+from abc import ABC, abstractmethod
+import os
+import sys
+from typing import Optional, TextIO, Union
+
+from . import escape_codes
+from .escape_codes import terminal_supports_colors
+from .metrics import metrics
+
+
+class Sink(ABC):
+    """
+    Destination of the rendered output of frames and progress bars, written with a single call per redraw.
+
+    An interactive sink receives cursor control sequences and is redrawn in place. A non-interactive sink, such as
+    a pipe or a CI log, receives plain-text snapshots at most once per ``snapshot_interval`` seconds instead.
+    Frames and progress bars are rendered with escape codes for colors and styles only if the sink supports them.
+
+    :param interactive: Whether the sink supports cursor control. If None, it is detected.
+    :param snapshot_interval: Minimum number of seconds between two snapshots in non-interactive mode.
+    :param colors: Whether the sink supports escape codes for colors and styles. If None, the setting of
+        ``set_color_support`` is used, or it is detected if there is none.
+    """
+
+    def __init__(
+        self, interactive: Optional[bool] = None, snapshot_interval: float = 5.0, colors: Optional[bool] = None
+    ) -> None:
+        self._interactive = interactive
+        self._colors = colors
+        self._detected_colors: Optional[bool] = None
+        self.snapshot_interval = snapshot_interval
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(interactive={self.interactive}, snapshot_interval={self.snapshot_interval})"
+
+    @property
+    def interactive(self) -> bool:
+        """Whether the sink supports cursor control."""
+        if self._interactive is None:
+            self._interactive = self._detect_interactive()
+        return self._interactive
+
+    @property
+    def colors(self) -> bool:
+        """Whether the sink supports escape codes for colors and styles."""
+        if self._colors is not None:
+            return self._colors
+        if escape_codes._color_override is not None:
+            return escape_codes._color_override
+        if self._detected_colors is None:
+            self._detected_colors = self._detect_colors()
+        return self._detected_colors
+
+    @abstractmethod
+    def write(self, text: str) -> None:
+        """
+        Write and flush the text.
+
+        :param text: The text to write.
+        """
+
+    def _detect_interactive(self) -> bool:
+        return False
+
+    def _detect_colors(self) -> bool:
+        return self.interactive
+
+    @staticmethod
+    def _record_write(size: int) -> None:
+        """Count a write of the given number of bytes."""
+        metrics.count("sink.writes")
+        metrics.count("sink.bytes_written", size)
+
+
+class StreamSink(Sink):
+    """
+    A sink writing to a text stream.
+
+    :param stream: The stream to write to. If None, the current ``sys.stdout`` is used for every write.
+    :param interactive: Whether the sink supports cursor control. If None, it is detected.
+    :param snapshot_interval: Minimum number of seconds between two snapshots in non-interactive mode.
+    :param colors: Whether the sink supports escape codes for colors and styles. If None, it is detected.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        interactive: Optional[bool] = None,
+        snapshot_interval: float = 5.0,
+        colors: Optional[bool] = None,
+    ) -> None:
+        super().__init__(interactive, snapshot_interval, colors)
+        self.stream = stream
+        self._stdout_tty: tuple[Optional[TextIO], bool] = (None, False)
+
+    @property
+    def interactive(self) -> bool:
+        """Whether the sink supports cursor control."""
+        if self._interactive is None and self.stream is None:
+            # sys.stdout may be replaced at any time, so the detection is cached per stdout object
+            stdout, tty = self._stdout_tty
+            if stdout is not sys.stdout:
+                tty = _isatty(sys.stdout)
+                self._stdout_tty = (sys.stdout, tty)
+            return tty
+        return super().interactive
+
+    @property
+    def colors(self) -> bool:
+        """Whether the sink supports escape codes for colors and styles."""
+        if self._colors is None and self.stream is None:
+            # Checked for the current standard output, like the interactivity
+            return terminal_supports_colors()
+        return super().colors
+
+    def write(self, text: str) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+        if metrics.enabled:
+            self._record_write(len(text.encode("utf-8", errors="replace")))
+
+    def _detect_interactive(self) -> bool:
+        return _isatty(self.stream)
+
+    def _detect_colors(self) -> bool:
+        return _isatty(self.stream)
+
+
+class FdSink(Sink):
+    """
+    A sink writing to a file descriptor.
+
+    :param fd: The file descriptor to write to.
+    :param interactive: Whether the sink supports cursor control. If None, it is detected.
+    :param snapshot_interval: Minimum number of seconds between two snapshots in non-interactive mode.
+    :param encoding: The encoding of the written text.
+    :param colors: Whether the sink supports escape codes for colors and styles. If None, it is detected.
+    """
+
+    def __init__(
+        self,
+        fd: int,
+        interactive: Optional[bool] = None,
+        snapshot_interval: float = 5.0,
+        encoding: str = "utf-8",
+        colors: Optional[bool] = None,
+    ) -> None:
+        super().__init__(interactive, snapshot_interval, colors)
+        self.fd = fd
+        self.encoding = encoding
+
+    def write(self, text: str) -> None:
+        data = memoryview(text.encode(self.encoding, errors="replace"))
+        if metrics.enabled:
+            self._record_write(len(data))
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def _detect_interactive(self) -> bool:
+        return os.isatty(self.fd)
+
+    def _detect_colors(self) -> bool:
+        return os.isatty(self.fd)
+
+
+class BufferSink(Sink):
+    """
+    A sink collecting the output in memory, for example for tests and benchmarks.
+
+    :param interactive: Whether to collect cursor control sequences instead of plain-text snapshots.
+    :param snapshot_interval: Minimum number of seconds between two snapshots in non-interactive mode.
+    :param colors: Whether to collect escape codes for colors and styles. If None, the setting of
+        ``set_color_support`` is used, or the value of ``interactive`` if there is none.
+    """
+
+    def __init__(self, interactive: bool = True, snapshot_interval: float = 5.0, colors: Optional[bool] = None) -> None:
+        super().__init__(interactive, snapshot_interval, colors)
+        self.buffer = io.StringIO()
+
+    def write(self, text: str) -> None:
+        self.buffer.write(text)
+        if metrics.enabled:
+            self._record_write(len(text.encode("utf-8", errors="replace")))
+
+    def getvalue(self) -> str:
+        """Return everything written so far."""
+        return self.buffer.getvalue()
+
+    def clear(self) -> None:
+        """Discard everything written so far."""
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+
+def _isatty(stream: Optional[TextIO]) -> bool:
+    """Check whether a stream is connected to a terminal, treating closed and unusual streams as not connected."""
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def as_sink(target: Union[Sink, TextIO, int, None] = None) -> Sink:
+    """
+    Get a sink for a target.
+
+    :param target: A sink, a text stream, a file descriptor, or None for the standard output.
+    :return: The sink.
+    """
+    if isinstance(target, Sink):
+        return target
+    if isinstance(target, int):
+        return FdSink(target)
+    return StreamSink(target)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from time import perf_counter
+from typing import AsyncIterable, Iterable, Optional
+
+from .frame import Frame, _split_lines
+from .template import MarkupTemplate
+
+
+class StreamFrame(Frame):
+    """
+    A frame showing the last lines of a stream, kept in a ring buffer of fixed capacity.
+
+    Lines are fed from an iterator, an async iterator or a tailed file, and the frame is redrawn at most once per
+    ``min_interval`` seconds while they arrive. Lines that were held back are drawn ``min_interval`` seconds after the
+    last redraw, even if the stream goes quiet in between.
+
+    :param capacity: Maximum number of lines kept. Older lines are discarded.
+    :param content: Initial lines of the frame.
+    :param padding: Padding around the text within the frame.
+    :param frame_style: Escape code for frame styling.
+    :param min_interval: Minimum number of seconds between two redraws while feeding lines.
+    :param kwargs: Further keyword arguments for the frame, such as ``viewport`` and ``height``.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        content: Optional[Iterable[str]] = None,
+        padding: int = 1,
+        frame_style: str = "",
+        min_interval: float = 0.1,
+        **kwargs,
+    ) -> None:
+        super().__init__(deque(content or (), maxlen=max(1, capacity)), padding, None, frame_style, **kwargs)
+        self._line_widths = deque(self._line_widths)
+        self.min_interval = min_interval
+        self._last_print = 0.0
+        self._pending = False
+        self._push_lock = threading.RLock()
+
+    @property
+    def capacity(self) -> int:
+        """The maximum number of lines kept."""
+        return self.lines.maxlen
+
+    def add_line(self, content: list[str] | str | MarkupTemplate, **values) -> StreamFrame:
+        """
+        Add lines to the frame, discarding the oldest lines once the capacity is reached.
+
+        :param content: Line(s) to add to the frame, or a template for a single line.
+        :param values: The values of the template fields, if content is a template.
+        :return: The updated StreamFrame object.
+        """
+        new_lines = _split_lines(content, values)
+        in_sync = self._is_tracked()
+        for line in new_lines:
+            if in_sync and len(self.lines) == self.capacity:
+                self._untrack_width(self._line_widths.popleft())
+            self.lines.append(line)
+            if in_sync:
+                self._track_width(self._render_line(line)[1])
+        if in_sync:
+            self.lines.changed = False
+        return self._update_frame()
+
+    def add_horizontal_rule(self) -> StreamFrame:
+        """
+        Add a horizontal rule (divider) to the frame, discarding the oldest line once the capacity is reached.
+
+        :return: The updated StreamFrame object.
+        """
+        return self.add_line(["<hr>"])
+
+    def print_frame(self, force: bool = False) -> None:
+        """
+        Print the frame to the console, rewriting only the rows that changed since the last print.
+
+        :param force: Whether to write a snapshot even if the snapshot interval of a non-interactive sink has not
+            passed.
+        """
+        super().print_frame(force)
+        self._last_print = perf_counter()
+        self._pending = False
+
+    def feed(self, lines: Iterable[str]) -> StreamFrame:
+        """
+        Add every line of an iterable, such as a file or the output of a process, redrawing at a limited rate.
+
+        :param lines: The lines to add. Trailing line breaks are removed.
+        :return: The updated StreamFrame object.
+        """
+        timer: Optional[threading.Timer] = None
+        try:
+            for line in lines:
+                delay = self._push(line)
+                if delay is not None and (timer is None or not timer.is_alive()):
+                    # Draw the held back lines even if the iterable blocks until the next line
+                    timer = threading.Timer(delay, self._flush_pending)
+                    timer.daemon = True
+                    timer.start()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        with self._push_lock:
+            self.print_frame(force=True)
+        return self
+
+    async def afeed(self, lines: AsyncIterable[str]) -> StreamFrame:
+        """
+        Add every line of an async iterable, redrawing at a limited rate.
+
+        :param lines: The lines to add. Trailing line breaks are removed.
+        :return: The updated StreamFrame object.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        handle: Optional[asyncio.TimerHandle] = None
+
+        def flush() -> None:
+            nonlocal handle
+            handle = None
+            self._flush_pending()
+
+        try:
+            async for line in lines:
+                delay = self._push(line)
+                if delay is not None and handle is None:
+                    # Draw the held back lines even if the next line takes a while
+                    handle = loop.call_later(delay, flush)
+        finally:
+            if handle is not None:
+                handle.cancel()
+        self.print_frame(force=True)
+        return self
+
+    def tail(
+        self,
+        path: str | os.PathLike,
+        from_start: bool = False,
+        poll_interval: float = 0.2,
+        stop: Optional[threading.Event] = None,
+    ) -> StreamFrame:
+        """
+        Follow a file and add the lines written to it, like ``tail -f``.
+
+        This blocks until ``stop`` is set or the thread is interrupted.
+
+        :param path: Path of the file to follow.
+        :param from_start: Whether to read the lines already in the file first. Only the last ``capacity`` of them
+            are kept.
+        :param poll_interval: Number of seconds to wait for new lines when the end of the file is reached.
+        :param stop: Event ending the loop when set.
+        :return: The updated StreamFrame object.
+        """
+        with open(path, encoding="utf-8", errors="replace") as file:
+            if not from_start:
+                file.seek(0, os.SEEK_END)
+            partial_line = ""
+            while stop is None or not stop.is_set():
+                line = file.readline()
+                if not line:
+                    if self._pending:
+                        self.print_frame()
+                    time.sleep(poll_interval)
+                elif not line.endswith("\n"):
+                    # The rest of the line has not been written yet
+                    partial_line += line
+                else:
+                    self._push(partial_line + line)
+                    partial_line = ""
+        self.print_frame(force=True)
+        return self
+
+    def _calculate_width(self) -> int:
+        """Calculate the width of the frame based on content, measuring every line again."""
+        width = super()._calculate_width()
+        self._line_widths = deque(self._line_widths)
+        return width
+
+    def _push(self, line: str) -> Optional[float]:
+        """
+        Add a line and redraw the frame if the last redraw is long enough ago.
+
+        :param line: The line to add.
+        :return: Number of seconds until the held back line is due to be drawn, or None if the frame was redrawn.
+        """
+        with self._push_lock:
+            self.add_line(line.rstrip("\r\n"))
+            elapsed = perf_counter() - self._last_print
+            if elapsed >= self.min_interval:
+                self.print_frame()
+                return None
+            self._pending = True
+            return self.min_interval - elapsed
+
+    def _flush_pending(self) -> None:
+        """Draw the lines held back since the last redraw, if any."""
+        with self._push_lock:
+            if self._pending:
+                self.print_frame()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import re
+from string import Formatter
+from typing import Optional
+
+from .escape_codes import _current_pattern, strip_tags, terminal_supports_colors, text2escape
+
+_formatter = Formatter()
+
+
+class RenderedMarkup(str):
+    """
+    Markup filled in from a MarkupTemplate, carrying its ANSI translation and visible width.
+
+    The string value is the filled-in markup, so it can be used wherever markup is accepted. Frames and the render
+    cache use the precomputed translation and width instead of translating it again.
+    """
+
+    def __new__(cls, markup: str, ansi: str, width: int, colors: bool) -> RenderedMarkup:
+        rendered = super().__new__(cls, markup)
+        rendered.ansi = ansi
+        rendered.width = width
+        rendered.colors = colors
+        return rendered
+
+
+class MarkupTemplate:
+    """
+    A markup string with ``{placeholder}`` fields, translated once and filled in with string joins.
+
+    The tags of the static text are translated to ANSI escape codes and its visible width is measured when the
+    template is created. Filling in the fields only joins the precomputed segments with the formatted values and
+    adds up their lengths. The values are inserted as plain text; tags in them are not translated.
+
+    :param markup: The markup, with fields in ``str.format`` syntax, for example
+        ``"<green>{done}<reset>/{total} <b>{rate}<reset>"``. Fields must be named.
+    """
+
+    def __init__(self, markup: str) -> None:
+        self.markup = markup
+        self._fields: list[tuple[str, Optional[str], str, Optional[str]]] = []
+        for literal, field_name, format_spec, conversion in _formatter.parse(markup):
+            if field_name is not None and (not field_name or field_name[0].isdigit()):
+                raise ValueError(f"Template fields must be named, got {{{field_name}}} in {markup!r}.")
+            self._fields.append((literal, field_name, format_spec or "", conversion))
+        self._compiled: dict[bool, tuple[re.Pattern, list, int]] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.markup!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MarkupTemplate) and self.markup == other.markup
+
+    def __hash__(self) -> int:
+        return hash(self.markup)
+
+    @property
+    def static_width(self) -> int:
+        """The visible width of the static text of the template."""
+        return self._compiled_for(terminal_supports_colors())[2]
+
+    def format(self, **values) -> RenderedMarkup:
+        """
+        Fill in the fields of the template.
+
+        :param values: The values of the fields.
+        :return: The filled-in markup, with its ANSI translation for the terminal and visible width.
+        """
+        return self._format(values, terminal_supports_colors())
+
+    def _format(self, values: dict, colors: bool) -> RenderedMarkup:
+        """
+        Fill in the fields of the template for output with or without escape codes.
+
+        :param values: The values of the fields.
+        :param colors: Whether the ANSI translation contains escape codes.
+        :return: The filled-in markup, with its ANSI translation and visible width.
+        """
+        _, segments, width = self._compiled_for(colors)
+        markup_parts = []
+        ansi_parts = []
+        for literal, literal_ansi, field_name, format_spec, conversion in segments:
+            markup_parts.append(literal)
+            ansi_parts.append(literal_ansi)
+            if field_name is None:
+                continue
+            if field_name.isidentifier():
+                value = values[field_name]
+            else:
+                value = _formatter.get_field(field_name, (), values)[0]
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            text = format(value, format_spec)
+            markup_parts.append(text)
+            ansi_parts.append(text)
+            width += len(text)
+        return RenderedMarkup("".join(markup_parts), "".join(ansi_parts), width, colors)
+
+    def _compiled_for(self, colors: bool) -> tuple[re.Pattern, list, int]:
+        """
+        Get the static text translated with or without escape codes, translating it again if the tag table changed.
+
+        :param colors: Whether the translation contains escape codes.
+        :return: Tuple of the tag pattern used, the segments of the template and the width of the static text.
+        """
+        pattern = _current_pattern()
+        compiled = self._compiled.get(colors)
+        if compiled is None or compiled[0] is not pattern:
+            segments = [
+                (literal, text2escape(literal, colors), field_name, format_spec, conversion)
+                for literal, field_name, format_spec, conversion in self._fields
+            ]
+            static_width = sum(len(strip_tags(literal)) for literal, *_ in self._fields)
+            compiled = self._compiled[colors] = (pattern, segments, static_width)
+        return compiled
@@ -0,0 +1,270 @@
+"""
+Benchmarks of the hot paths of popi_lib.
+
+All output is written to in-memory sinks and streams with colors enabled, so the results do not depend on the
+terminal. Run from the package root, for example::
+
+    python -m popi_lib.test.benchmarks --output results.json
+    python -m popi_lib.test.benchmarks --compare results.json
+
+With ``--compare``, every benchmark that got slower than the baseline by more than the threshold is reported as a
+regression and the exit status is 1.
+"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from typing import Callable, Optional
+
+import popi_lib
+from popi_lib import (
+    BufferSink, CustomFormatter, Frame, JsonFormatter, ProgressBar, set_color_support, strip_tags, text2escape
+)
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(popi_lib.__file__)))
+FRAME_SIZES = (10, 1_000, 100_000)
+# Import statements timed in fresh interpreters. The lazy package import alone is cheap, so the import of the
+# classes a command-line tool actually uses is timed as well
+IMPORTS = {
+    "import": "import popi_lib",
+    "import.progressbar_frame": "from popi_lib import ProgressBar, Frame",
+}
+
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Register a function that prepares a benchmark and returns the callable to time."""
+
+    def register(setup: Callable[[], Callable[[], object]]) -> Callable[[], Callable[[], object]]:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("text2escape.long")
+def text2escape_long() -> Callable[[], object]:
+    text = "<b>Status<reset> " + "plain text without any tags " * 2_000 + "<green>done<reset>"
+    return lambda: text2escape(text)
+
+
+@benchmark("text2escape.tagged")
+def text2escape_tagged() -> Callable[[], object]:
+    text = "".join(
+        f"<red>{i}<reset><b><u>x<reset><blue_bg> <reset><bright_cyan><i>y<reset>" for i in range(2_000)
+    )
+    assert "<" not in strip_tags(text), "all tags of the benchmark must be known tags"
+    return lambda: text2escape(text)
+
+
+def _frame(size: int) -> Frame:
+    frame = Frame([f"<green>line<reset> {i}" for i in range(size)], sink=BufferSink())
+    frame._display_frame()
+    frame.sink.clear()
+    return frame
+
+
+def _register_frame_benchmarks(size: int) -> None:
+    @benchmark(f"frame.build.{size}")
+    def frame_build() -> Callable[[], object]:
+        frame = _frame(size)
+        return frame._build_frame
+
+    @benchmark(f"frame.print.{size}")
+    def frame_print() -> Callable[[], object]:
+        frame = _frame(size)
+        state = {"count": 0}
+
+        def print_frame() -> None:
+            # Change one line per print so that every print writes an update
+            state["count"] += 1
+            frame.edit_line(size // 2, f"<red>edited<reset> {state['count']}")
+            frame.print_frame()
+            frame.sink.clear()
+
+        return print_frame
+
+
+for _size in FRAME_SIZES:
+    _register_frame_benchmarks(_size)
+
+
+@benchmark("progressbar.display")
+def progressbar_display() -> Callable[[], object]:
+    def display_loop() -> None:
+        bar = ProgressBar(1_000, 40, sink=BufferSink())
+        for _ in range(1_000):
+            bar.add(1)
+            bar.display()
+
+    return display_loop
+
+
+@benchmark("progressbar.display.throttled")
+def progressbar_display_throttled() -> Callable[[], object]:
+    def display_loop() -> None:
+        bar = ProgressBar(100_000, 40, min_delta=1_000, sink=BufferSink())
+        for _ in range(100_000):
+            bar.add(1)
+            bar.display()
+
+    return display_loop
+
+
+@benchmark("progressbar.display.smooth_rate_eta")
+def progressbar_display_smooth() -> Callable[[], object]:
+    def display_loop() -> None:
+        bar = ProgressBar(1_000, 40, smooth=True, show_rate=True, show_eta=True, sink=BufferSink())
+        for _ in range(1_000):
+            bar.add(1)
+            bar.display()
+
+    return display_loop
+
+
+def _format_records(formatter: logging.Formatter) -> Callable[[], object]:
+    records = [
+        logging.LogRecord("bench", level, __file__, 1, "Message %d with %s", (i, "arguments"), None)
+        for i, level in enumerate((logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR) * 250)
+    ]
+
+    def format_records() -> None:
+        for record in records:
+            formatter.format(record)
+
+    return format_records
+
+
+@benchmark("logger.format")
+def logger_format() -> Callable[[], object]:
+    return _format_records(CustomFormatter())
+
+
+@benchmark("logger.format.json")
+def logger_format_json() -> Callable[[], object]:
+    return _format_records(JsonFormatter({"service": "benchmark"}))
+
+
+def import_time(statement: str, runs: int = 5) -> float:
+    """
+    Measure the time an import statement takes in fresh interpreters.
+
+    :param statement: The import statement.
+    :param runs: Number of interpreters to start.
+    :return: The shortest time in seconds.
+    """
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+    script = f"from time import perf_counter\nstart = perf_counter()\n{statement}\nprint(perf_counter() - start)"
+    times = []
+    for _ in range(runs):
+        stdout = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True, cwd=PACKAGE_ROOT
+        ).stdout
+        times.append(float(stdout))
+    return min(times)
+
+
+def run(names: Optional[list[str]] = None, repeat: int = 5, min_time: float = 0.2) -> dict[str, float]:
+    """
+    Run the benchmarks.
+
+    :param names: Names of the benchmarks to run. If None, all benchmarks are run.
+    :param repeat: Number of timed rounds per benchmark. The fastest round is reported.
+    :param min_time: Minimum duration of a round in seconds.
+    :return: Dictionary mapping the benchmark names to the seconds per call.
+    """
+    set_color_support(True)
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        timer = timeit.Timer(setup())
+        number = 1
+        while timer.timeit(number) < min_time / 10 and number < 1_000_000:
+            number *= 10
+        number = max(1, int(number * min_time / max(timer.timeit(number), 1e-9)))
+        results[name] = min(timer.repeat(repeat, number)) / number
+        print(f"{name:<40} {_format_seconds(results[name])}", file=sys.stderr)
+    for name, statement in IMPORTS.items():
+        if names and name not in names:
+            continue
+        results[name] = import_time(statement, repeat)
+        print(f"{name:<40} {_format_seconds(results[name])}", file=sys.stderr)
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """
+    Compare results with a baseline.
+
+    :param results: The current results.
+    :param baseline: The results of the baseline.
+    :param threshold: Relative slowdown above which a benchmark counts as a regression.
+    :return: Names of the benchmarks that regressed.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {_format_seconds(seconds)}  (new)")
+            continue
+        ratio = seconds / baseline[name]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        marker = "REGRESSION" if regressed else ("improved" if ratio < 1 - threshold else "")
+        print(f"{name:<40} {_format_seconds(baseline[name])} -> {_format_seconds(seconds)}  {ratio:6.2f}x  {marker}")
+    return regressions
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:9.3f} {unit}"
+    return f"{seconds / 1e-9:9.3f} ns"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all, plus the import timings)")
+    parser.add_argument("--output", "-o", help="write the results to this JSON file")
+    parser.add_argument("--compare", "-c", metavar="BASELINE", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", "-t", type=float, default=0.2, help="relative slowdown counted as regression")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of a round in seconds")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join([*BENCHMARKS, *IMPORTS]))
+        return 0
+
+    results = run(args.names, args.repeat, args.min_time)
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2)
+            file.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
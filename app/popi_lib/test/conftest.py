@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from popi_lib.src import progressbar, stream_frame
+
+
+class FakeClock:
+    """Replacement for perf_counter that only advances when a test sets ``now``."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    for module in (progressbar, stream_frame):
+        monkeypatch.setattr(module, "perf_counter", fake_clock)
+    return fake_clock
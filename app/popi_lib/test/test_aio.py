@@ -0,0 +1,84 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+
+import pytest
+
+from popi_lib import AsyncRenderer, BufferSink, Frame, ProgressBar, ProgressGroup, Registrar
+from popi_lib.src.progress_group import _RowRenderer
+
+
+class SlowSink(BufferSink):
+    """Sink recording how many writes run at the same time."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self._counter_lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        with self._counter_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        super().write(text)
+        with self._counter_lock:
+            self.active -= 1
+
+
+def test_writes_do_not_overlap():
+    sink = SlowSink()
+    bar = ProgressBar(20, 10, sink=sink)
+
+    async def main() -> None:
+        renderer = AsyncRenderer([bar], refresh_rate=100, sink=sink)
+        await renderer.astart()
+        for _ in range(20):
+            bar.add(1)
+            await asyncio.sleep(0.01)
+        await renderer.astop()
+
+    asyncio.run(main())
+    assert sink.peak == 1
+    assert "(20/20) 100.00%" in sink.getvalue()
+
+
+def test_renderer_holds_bars_and_frames():
+    frame = Frame("status")
+    bar = ProgressBar(10, 10)
+    renderer = AsyncRenderer([frame], sink=BufferSink()).add(bar)
+    assert renderer.items == [frame, bar]
+    assert len(renderer._rows()) == 4
+    assert not isinstance(renderer, ProgressGroup)
+    assert not hasattr(renderer, "start")
+
+
+def test_async_context_managers_use_the_item_sink():
+    frame_sink = BufferSink()
+    bar_sink = BufferSink()
+
+    async def main() -> None:
+        async with Frame("status", sink=frame_sink) as frame:
+            frame.edit_line(0, "done")
+        async with ProgressBar(3, 10, sink=bar_sink) as bar:
+            bar.add(3)
+
+    asyncio.run(main())
+    assert "done" in frame_sink.getvalue()
+    assert "(3/3) 100.00%" in bar_sink.getvalue()
+
+
+def test_row_renderer_is_abstract_and_private():
+    with pytest.raises(TypeError):
+        _RowRenderer()
+
+    class _NoRows(_RowRenderer):
+        pass
+
+    with pytest.raises(TypeError):
+        _NoRows()
+    assert "_RowRenderer" not in Registrar.get_all()
+    assert Registrar.get("ProgressGroup") is ProgressGroup
+    assert Registrar.get("AsyncRenderer") is AsyncRenderer
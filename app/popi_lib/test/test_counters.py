@@ -0,0 +1,51 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from popi_lib import BufferSink, ProcessCounter, ProgressBar, ProgressGroup, ThreadCounter
+
+_worker_counter: Optional[ProcessCounter] = None
+
+
+def _init_worker(counter: ProcessCounter) -> None:
+    global _worker_counter
+    _worker_counter = counter
+
+
+def _count_in_worker(amount: int) -> None:
+    for _ in range(amount):
+        _worker_counter.add(1)
+
+
+def test_thread_counter_counts_every_add():
+    counter = ThreadCounter()
+    bar = ProgressBar(4000, 10, counter=counter, sink=BufferSink())
+    group = ProgressGroup([bar], sink=BufferSink())
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: [bar.add(1) for _ in range(500)], range(8)))
+    assert counter.value == 4000
+    group.refresh()
+    assert bar.progress == 4000
+    assert "(4000/4000) 100.00%" in group.sink.getvalue()
+
+
+def test_process_counter_counts_every_add():
+    counter = ProcessCounter()
+    bar = ProgressBar(4000, 10, counter=counter, sink=BufferSink())
+    with ProcessPoolExecutor(4, initializer=_init_worker, initargs=(counter,)) as executor:
+        list(executor.map(_count_in_worker, [1000] * 4))
+    assert counter.value == 4000
+    assert bar.sync().progress == 4000
+    assert bar.render().endswith("(4000/4000) 100.00%")
+
+
+def test_bar_updates_go_to_the_counter():
+    counter = ThreadCounter(5)
+    bar = ProgressBar(10, 10, initial_progress=2, counter=counter, sink=BufferSink())
+    assert counter.value == 2
+    bar.add(3)
+    assert counter.value == 5
+    bar.set(7)
+    assert counter.value == 7
+    counter.add(1)
+    assert bar.sync().progress == 8
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from popi_lib import (
+    BufferSink, Frame, MarkupTemplate, escape_code_dict, render_cache, set_color_support, strip_tags, text2escape
+)
+from popi_lib.src import escape_codes
+
+
+@pytest.fixture(autouse=True)
+def restore_tag_table():
+    saved = dict(escape_code_dict)
+    yield
+    escape_code_dict.clear()
+    escape_code_dict.update(saved)
+    set_color_support(None)
+
+
+def test_translates_tags():
+    assert text2escape("<b>bold<reset> <red>red<red_bg>", colors=True) == "\033[1mbold\033[0m \033[31mred\033[41m"
+
+
+def test_longer_tags_are_not_shadowed_by_their_prefixes():
+    escape_code_dict["<bright>"] = "!"
+    assert text2escape("<bright_red>x<bright>", colors=True) == "\033[91mx!"
+
+
+def test_unknown_tags_stay_literal():
+    assert text2escape("<orange>x</b> a < b > c", colors=True) == "<orange>x</b> a < b > c"
+
+
+def test_without_colors_tags_are_removed():
+    assert text2escape("<b>bold<reset> <orange>", colors=False) == "bold <orange>"
+
+
+def test_strip_tags():
+    assert strip_tags("<b><u>x<reset><hr> y") == "x y"
+    assert strip_tags("no tags") == "no tags"
+    assert strip_tags("") == ""
+
+
+def test_added_tags_take_effect():
+    escape_code_dict["<orange>"] = "\033[38;5;208m"
+    assert text2escape("<orange>x", colors=True) == "\033[38;5;208mx"
+    assert strip_tags("<orange>x") == "x"
+
+
+def test_removed_tags_stay_literal():
+    text2escape("<b>x", colors=True)
+    del escape_code_dict["<b>"]
+    assert text2escape("<b>x<reset>", colors=True) == "<b>x\033[0m"
+    assert strip_tags("<b>x") == "<b>x"
+
+
+def test_changed_codes_take_effect():
+    text2escape("<b>x", colors=True)
+    escape_code_dict["<b>"] = "B"
+    assert text2escape("<b>x", colors=True) == "Bx"
+
+
+def test_replaced_table_takes_effect(monkeypatch):
+    monkeypatch.setattr(escape_codes, "escape_code_dict", {"<x>": "X"})
+    assert text2escape("<x><b>", colors=True) == "X<b>"
+
+
+def test_render_cache_follows_the_tag_table():
+    set_color_support(True)
+    render_cache.clear()
+    assert render_cache.get("<orange>x") == ("<orange>x", 9)
+    escape_code_dict["<orange>"] = "O"
+    assert render_cache.get("<orange>x") == ("Ox", 1)
+    del escape_code_dict["<b>"]
+    assert render_cache.get("<b>x") == ("<b>x", 4)
+
+
+def test_frame_follows_the_tag_table():
+    frame = Frame("<orange>x", sink=BufferSink(colors=True))
+    assert frame.width == 9
+    escape_code_dict["<orange>"] = "O"
+    assert frame._build_frame()[1] == "\033[0m│\033[0m Ox \033[0m│\033[0m"
+    assert frame.width == 1
+
+
+def test_template_follows_the_tag_table():
+    template = MarkupTemplate("<orange>{value}")
+    assert template.static_width == 8
+    escape_code_dict["<orange>"] = "O"
+    assert template._format({"value": 1}, True).ansi == "O1"
+    assert template.static_width == 0
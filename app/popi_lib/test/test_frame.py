@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+
+from popi_lib import BufferSink, Frame, StreamFrame, render_cache, set_color_support
+
+
+@pytest.fixture(autouse=True)
+def plain_output():
+    set_color_support(False)
+    yield
+    set_color_support(None)
+
+
+def test_width_follows_add_and_edit():
+    frame = Frame(["ab", "abcd"], sink=BufferSink())
+    assert frame.width == 4
+    frame.add_line("<b>abcdef<reset>")
+    assert frame.width == 6
+    frame.edit_line(2, "a")
+    assert frame.width == 4
+    frame.edit_line(1, "")
+    assert frame.width == 2
+
+
+@pytest.mark.parametrize("modify", [
+    lambda lines: lines.__setitem__(0, "a much longer line"),
+    lambda lines: lines.append("a much longer line"),
+    lambda lines: lines.insert(0, "a much longer line"),
+    lambda lines: lines.extend(["a much longer line"]),
+])
+def test_width_follows_direct_modifications(modify):
+    frame = Frame(["short", "lines"], sink=BufferSink())
+    modify(frame.lines)
+    frame.print_frame()
+    rows = frame._build_frame()
+    assert frame.width == len("a much longer line")
+    assert len({len(row) for row in rows}) == 1
+
+
+def test_width_follows_removed_lines():
+    frame = Frame(["a much longer line", "short"], sink=BufferSink())
+    del frame.lines[0]
+    frame.add_line("tiny")
+    assert frame.width == 5
+
+
+def test_assigned_lines_are_measured():
+    frame = Frame("short", sink=BufferSink())
+    frame.lines = ["a much longer line"]
+    frame.add_line("x")
+    assert frame.width == len("a much longer line")
+
+
+def test_stream_frame_tracks_evicted_and_modified_lines():
+    frame = StreamFrame(capacity=2, content=["a much longer line"], sink=BufferSink())
+    frame.add_line("ab")
+    frame.add_line("abc")
+    assert list(frame.lines) == ["ab", "abc"]
+    assert frame.width == 3
+    frame.lines[0] = "abcdef"
+    frame.add_line("x")
+    assert list(frame.lines) == ["abc", "x"]
+    assert frame.width == 3
+    frame.lines.appendleft("abcdefgh")
+    frame.print_frame()
+    assert frame.width == 8
+
+
+def test_large_frames_do_not_use_the_shared_render_cache():
+    set_color_support(True)
+    render_cache.clear()
+    frame = Frame([f"<green>line<reset> {i}" for i in range(3000)], sink=BufferSink())
+    frame._build_frame()
+    rows = frame._build_frame()
+    assert rows[1] == "\033[0m│\033[0m \033[32mline\033[0m 0    \033[0m│\033[0m"
+    assert render_cache.info()["size"] <= 2
+
+    for i in range(10000):
+        frame.edit_line(0, f"<red>{i}<reset>")
+    assert len(frame._line_renders) <= 2 * len(frame.lines) + 65
+
+
+def test_kept_translations_follow_color_support():
+    frame = Frame("<green>x<reset>", sink=BufferSink())
+    assert "\033[32m" not in frame._build_frame()[1]
+    set_color_support(True)
+    assert "\033[32m" in frame._build_frame()[1]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+import io
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from typing import Optional
+
+import pytest
+
+import popi_lib
+from popi_lib import CustomFormatter, CustomLogger, JsonFormatter
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(popi_lib.__file__)))
+
+
+def async_logger(overflow: str, queue_size: int = 5) -> tuple[CustomLogger, io.StringIO]:
+    logger = CustomLogger(f"test-{overflow}", async_mode=True, queue_size=queue_size, overflow=overflow)
+    stream = io.StringIO()
+    logger._handler.listener.handler.setStream(stream)
+    return logger, stream
+
+
+def log_in_thread(logger: CustomLogger, count: int) -> None:
+    """Log from another thread and fail instead of hanging if logging blocks."""
+    thread = threading.Thread(target=lambda: [logger.info("message %d", i) for i in range(count)], daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "logging blocked"
+
+
+@pytest.mark.parametrize("overflow", ["block", "drop_oldest"])
+def test_async_logger_writes_all_records(overflow):
+    logger, stream = async_logger(overflow, queue_size=10000)
+    log_in_thread(logger, 100)
+    logger.shutdown()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 100
+    assert "message 99" in lines[-1]
+
+
+@pytest.mark.parametrize("overflow", ["block", "drop_oldest"])
+def test_async_logger_writes_directly_after_shutdown(overflow):
+    logger, stream = async_logger(overflow)
+    logger.info("before")
+    logger.shutdown()
+    log_in_thread(logger, 10)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 11
+    assert "before" in lines[0]
+    assert "message 9" in lines[-1]
+
+
+def test_shutdown_is_idempotent():
+    logger, stream = async_logger("block")
+    logger.shutdown()
+    logger.shutdown()
+    logger.info("after")
+    assert "after" in stream.getvalue()
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        CustomLogger("test-invalid", async_mode=True, overflow="grow")
+
+
+def run_script(script: str, **env: str) -> subprocess.CompletedProcess:
+    """Run a script in a fresh interpreter, so that the logging setup starts from scratch."""
+    prelude = "import logging\nfrom popi_lib import Base\nclass Plugin(Base): pass\n"
+    environment = {key: value for key, value in os.environ.items() if not key.startswith("POPI_LIB_")}
+    environment.update(env, PYTHONPATH=PACKAGE_ROOT)
+    return subprocess.run(
+        [sys.executable, "-c", prelude + script], capture_output=True, text=True, env=environment, check=True
+    )
+
+
+def test_class_logger_configures_unconfigured_logging():
+    result = run_script("Plugin.logger.info('hello'); print(logging.getLogger('popi_lib').level)")
+    assert "hello" in result.stderr
+    assert result.stdout.strip() == "20"
+
+
+def test_class_logger_keeps_application_level():
+    result = run_script(
+        "logging.getLogger('popi_lib').setLevel(logging.WARNING)\n"
+        "Plugin.logger.info('hidden'); Plugin.logger.warning('shown')\n"
+        "print(logging.getLogger('popi_lib').level, len(logging.getLogger('popi_lib').handlers))"
+    )
+    assert "hidden" not in result.stderr
+    assert "shown" in result.stderr
+    assert result.stdout.strip() == "30 0"
+
+
+def test_class_logger_propagates_to_application_handlers():
+    result = run_script(
+        "logging.basicConfig(format='app: %(name)s %(message)s')\n"
+        "Plugin.logger.warning('hello')\n"
+        "print(logging.getLogger('popi_lib').handlers)"
+    )
+    assert result.stderr.splitlines() == ["app: popi_lib.Plugin hello"]
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("value, expected", [("debug", "10"), ("WARN", "30"), ("15", "15"), ("verbose", "20")])
+def test_level_from_environment(value, expected):
+    result = run_script("Plugin.logger; print(logging.getLogger('popi_lib').level)", POPI_LIB_LOG_LEVEL=value)
+    assert result.stdout.strip() == expected
+
+
+def json_record(formatter, levelno: int = logging.INFO, **extra) -> dict:
+    record = logging.LogRecord("test", levelno, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    line = formatter.format(record)
+    pairs = json.loads(line, object_pairs_hook=lambda items: items)
+    keys = [key for key, _ in pairs]
+    assert len(keys) == len(set(keys)), f"duplicate keys in {line}"
+    return dict(pairs)
+
+
+def test_json_formatter_fields():
+    data = json_record(JsonFormatter({"service": "svc"}), job_id=7, tags=["a"])
+    assert data["level"] == "INFO"
+    assert data["logger"] == "test"
+    assert data["message"] == "hello world"
+    assert data["service"] == "svc"
+    assert data["job_id"] == 7
+    assert data["tags"] == ["a"]
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}[+-]\d\d:\d\d", data["time"])
+
+
+def test_json_formatter_prefixes_colliding_keys():
+    formatter = JsonFormatter({"level": "static", "service": "svc"})
+    data = json_record(formatter, level="extra", time=1, service="extra", extra_service=2)
+    assert data["level"] == "INFO"
+    assert data["extra_level"] == "static"
+    assert data["extra_extra_level"] == "extra"
+    assert data["extra_time"] == 1
+    assert data["service"] == "svc"
+    assert data["extra_extra_service"] == "extra"
+    assert data["extra_service"] == 2
+
+
+def test_json_level_names_are_stable():
+    formatter = JsonFormatter()
+    assert json_record(formatter, logging.WARNING)["level"] == "WARNING"
+    CustomFormatter()
+    assert logging.getLevelName(logging.WARNING) == "WARN"
+    assert json_record(formatter, logging.WARNING)["level"] == "WARNING"
+    assert json_record(JsonFormatter(), logging.WARNING)["level"] == "WARNING"
+
+
+def log_record(levelno: int = logging.INFO, created: Optional[float] = None, exc_info=None) -> logging.LogRecord:
+    record = logging.LogRecord("test", levelno, __file__, 1, "hello %s", ("world",), exc_info)
+    if created is not None:
+        record.created = created
+    return record
+
+
+def reference_format(formatter: CustomFormatter, record: logging.LogRecord) -> str:
+    """Format a record like CustomFormatter did before the formatters were cached, with a formatter per record."""
+    fmt = formatter.FORMATS.get(record.levelno, formatter._fmt)
+    return logging.Formatter(fmt, datefmt=formatter.datefmt, style="{").format(record)
+
+
+@pytest.mark.parametrize("levelno", [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL, 25])
+def test_custom_formatter_output_per_level(levelno):
+    formatter = CustomFormatter()
+    assert formatter.format(log_record(levelno)) == reference_format(formatter, log_record(levelno))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        exc_info = sys.exc_info()
+    formatted = formatter.format(log_record(levelno, exc_info=exc_info))
+    assert formatted == reference_format(formatter, log_record(levelno, exc_info=exc_info))
+    assert formatted.endswith("ValueError: boom")
+
+
+def test_custom_formatter_time_changes_with_the_second():
+    formatter = CustomFormatter()
+    start = 1_700_000_000.0
+    first = formatter.formatTime(log_record(created=start + 0.1))
+    assert formatter.formatTime(log_record(created=start + 0.9)) == first
+    second = formatter.formatTime(log_record(created=start + 1.0))
+    assert second != first
+    assert second == datetime.fromtimestamp(start + 1).strftime(CustomFormatter.default_time_format)
+    assert formatter.formatTime(log_record(created=start + 1.0), "%Y") == datetime.fromtimestamp(start).strftime("%Y")
+
+
+def test_custom_formatter_time_with_microseconds():
+    formatter = CustomFormatter(datefmt="%H:%M:%S.%f")
+    start = 1_700_000_000.0
+    records = [log_record(created=start + 0.25), log_record(created=start + 0.5)]
+    times = [formatter.format(record).split("]")[0].split("[")[-1] for record in records]
+    assert times == [datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f") for record in records]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import logging
+
+import pytest
+
+from popi_lib import BufferSink, CustomFormatter, Frame, JsonFormatter, ProgressBar, RenderEvent, metrics, render_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.disable().reset()
+
+
+def test_nothing_is_collected_while_disabled():
+    with Frame("hello", sink=BufferSink()) as frame:
+        frame.edit_line(0, "world").print_frame()
+    ProgressBar(10, 10, sink=BufferSink()).add(1).display()
+    snapshot = metrics.snapshot()
+    assert not snapshot["enabled"]
+    assert snapshot["counters"] == {}
+    assert snapshot["timings"] == {}
+
+
+def test_frame_redraws_are_counted():
+    metrics.enable()
+    frame = Frame("hello", sink=BufferSink())
+    frame.print_frame()
+    frame.print_frame()
+    frame.edit_line(0, "world").print_frame()
+    counters = metrics.snapshot()["counters"]
+    assert counters["frame.redraws"] == 2
+    assert counters["frame.skipped_redraws"] == 1
+
+
+def test_progress_bar_redraws_are_counted():
+    metrics.enable()
+    bar = ProgressBar(100, 10, min_delta=10, sink=BufferSink())
+    for _ in range(20):
+        bar.add(1).display()
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["progressbar.redraws"] == 2
+    assert snapshot["counters"]["progressbar.skipped_redraws"] == 18
+    assert snapshot["timings"]["progressbar.display"]["count"] == 20
+
+
+def test_sink_writes_count_encoded_bytes():
+    metrics.enable()
+    sink = BufferSink()
+    sink.write("a")
+    sink.write("ä│")
+    counters = metrics.snapshot()["counters"]
+    assert counters["sink.writes"] == 2
+    assert counters["sink.bytes_written"] == 1 + 2 + 3
+
+
+def test_hooks_receive_render_events():
+    events = []
+    metrics.enable().add_hook(events.append)
+    try:
+        frame = Frame("hello", sink=BufferSink())
+        frame.print_frame()
+        bar = ProgressBar(10, 10, sink=BufferSink())
+        bar.display()
+    finally:
+        metrics.remove_hook(events.append)
+    assert [event.name for event in events] == ["frame.build", "progressbar.display"]
+    assert all(isinstance(event, RenderEvent) and event.duration >= 0 for event in events)
+    assert events[0].source is frame
+    assert events[1].source is bar
+    timing = metrics.snapshot()["timings"]["frame.build"]
+    assert timing["count"] == 1
+    assert timing["total"] == timing["mean"] == timing["max"] == events[0].duration
+
+
+def test_log_formatting_is_timed():
+    metrics.enable()
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello", (), None)
+    CustomFormatter().format(record)
+    JsonFormatter().format(record)
+    assert metrics.snapshot()["timings"]["logger.format"]["count"] == 2
+
+
+def test_removed_hooks_are_not_called():
+    events = []
+    metrics.enable().add_hook(events.append).remove_hook(events.append)
+    Frame("hello", sink=BufferSink()).print_frame()
+    assert events == []
+    assert metrics.snapshot()["timings"]["frame.build"]["count"] == 1
+
+
+def test_snapshot_includes_render_cache_statistics():
+    render_cache.clear()
+    render_cache.get("<b>x")
+    render_cache.get("<b>x")
+    assert metrics.snapshot()["render_cache"] == render_cache.info()
+    assert metrics.snapshot()["render_cache"]["hits"] == 1
+    assert metrics.snapshot()["render_cache"]["misses"] == 1
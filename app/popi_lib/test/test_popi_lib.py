@@ -0,0 +1,61 @@
+from __future__ import annotations
+import os
+import subprocess
+import sys
+
+import pytest
+
+import popi_lib
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(popi_lib.__file__)))
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter that imports popi_lib from this source tree."""
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, check=True)
+
+
+def imported_modules(statement: str) -> dict[str, int]:
+    """Run a statement with ``-X importtime`` and return the cumulative import time in microseconds per module."""
+    modules = {}
+    for line in run_python("-X", "importtime", "-c", statement).stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_import_loads_no_submodules():
+    modules = imported_modules("import popi_lib")
+    assert "popi_lib" in modules
+    assert [name for name in modules if name.startswith("popi_lib.")] == []
+    assert "logging" not in modules
+    assert "colorama" not in modules
+
+
+@pytest.mark.skipif(os.name == "nt", reason="colorama is needed on Windows")
+def test_progressbar_import_skips_heavy_modules():
+    modules = imported_modules("from popi_lib import ProgressBar, Frame")
+    for name in ("colorama", "logging", "multiprocessing"):
+        assert name not in modules
+
+
+def test_import_does_not_probe_terminal():
+    statement = (
+        "import popi_lib; from popi_lib.src import escape_codes; "
+        "popi_lib.Frame, popi_lib.CustomFormatter; "
+        "print(escape_codes._color_support)"
+    )
+    assert run_python("-c", statement).stdout.strip() == "None"
+
+
+def test_lazy_attributes():
+    from popi_lib.src.frame import Frame
+
+    assert popi_lib.Frame is Frame
+    assert set(popi_lib.__all__) <= set(dir(popi_lib))
+    with pytest.raises(AttributeError):
+        popi_lib.does_not_exist
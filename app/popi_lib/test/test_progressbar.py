@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import pytest
+
+from popi_lib import BufferSink, ProgressBar
+
+
+def test_rate_decays_while_stalled(clock):
+    bar = ProgressBar(1000, 10, show_rate=True, show_eta=True, sink=BufferSink())
+    for _ in range(10):
+        clock.now += 0.1
+        bar.add(10)
+    assert bar.rate == pytest.approx(100)
+
+    clock.now += 1.0
+    line = bar.render()
+    assert bar.rate < 5
+    assert "100.00 it/s" not in line
+    assert bar.eta > 100
+
+
+def test_long_gap_weighs_like_several_samples(clock):
+    bar = ProgressBar(1000, 10, track_rate=True, smoothing=0.5, sink=BufferSink())
+    clock.now += 0.1
+    bar.add(10)
+    clock.now += 0.2
+    bar.add(0)
+    assert bar.rate == pytest.approx(25)
+
+
+class SizedWithoutHint:
+    def __len__(self) -> int:
+        return 10
+
+    def __iter__(self):
+        return iter(range(10).__iter__().__next__, None)
+
+
+@pytest.mark.parametrize("iterable", [list(range(10)), tuple(range(10)), range(10), SizedWithoutHint()])
+def test_track_counts_consumed_items_when_stopped_early(iterable):
+    sink = BufferSink()
+    bar = ProgressBar(10, 10, sink=sink)
+    for index, _ in enumerate(bar.track(iterable)):
+        if index == 4:
+            break
+    assert bar.progress == 5
+    assert sink.getvalue().endswith("(05/10) 50.00%\033[K")
+
+
+def test_track_counts_all_items():
+    bar = ProgressBar(1000, 10, sink=BufferSink())
+    assert sum(1 for _ in bar.track(range(1000))) == 1000
+    assert bar.progress == 1000
+    items = iter(range(100))
+    assert sum(1 for _ in ProgressBar(100, 10, sink=BufferSink()).track(items)) == 100
+
+
+def test_display_skips_small_changes():
+    sink = BufferSink()
+    bar = ProgressBar(100, 10, min_delta=10, sink=sink)
+    for _ in range(100):
+        bar.add(1).display()
+    assert sink.getvalue().count("\r") == 11
+    assert "(100/100) 100.00%" in sink.getvalue().rsplit("\r", 1)[1]
+
+
+def test_display_skips_redraws_within_min_interval(clock):
+    sink = BufferSink()
+    bar = ProgressBar(100, 10, min_interval=1.0, sink=sink)
+    for _ in range(99):
+        clock.now += 0.25
+        bar.add(1).display()
+    assert sink.getvalue().count("\r") == 25
+    bar.add(1).display()
+    assert sink.getvalue().count("\r") == 26
+    assert "(100/100) 100.00%" in sink.getvalue().rsplit("\r", 1)[1]
+
+
+def test_display_skips_identical_output():
+    sink = BufferSink()
+    bar = ProgressBar(1000, 10, sink=sink)
+    bar.display()
+    bar.add(1).display()
+    bar.display()
+    assert sink.getvalue().count("\r") == 2
+    bar.display(force=True)
+    assert sink.getvalue().count("\r") == 3
+
+
+def bar_of(bar: ProgressBar) -> str:
+    return bar.render().split(" ")[0]
+
+
+def test_fill_step_is_exact():
+    # 15 / 22 * 22 is 14.999999999999998 in floating point
+    assert bar_of(ProgressBar(22, 22, initial_progress=15, sink=BufferSink())) == "#" * 15 + "-" * 7
+    for progress in range(1, 22):
+        bar = ProgressBar(22, 22, initial_progress=progress, sink=BufferSink())
+        assert bar_of(bar).count("#") == progress
+
+
+def test_smooth_bar_uses_eighth_blocks():
+    bar = ProgressBar(32, 4, smooth=True, sink=BufferSink())
+    assert bar_of(bar.set(0)) == "----"
+    assert bar_of(bar.set(1)) == "▏---"
+    assert bar_of(bar.set(13)) == "█▋--"
+    assert bar_of(bar.set(31)) == "███▉"
+    assert bar_of(bar.set(32)) == "████"
+
+
+def test_changing_the_style_rebuilds_the_bar():
+    bar = ProgressBar(10, 10, initial_progress=5, sink=BufferSink())
+    assert bar_of(bar) == "#####-----"
+    bar.fill = "="
+    bar.empty = "."
+    assert bar_of(bar) == "#====....-"
+    bar.length = 4
+    assert bar_of(bar) == "#=.-"
+    bar.smooth = True
+    assert bar_of(bar) == "██.."
+    bar.smooth = False
+    assert bar_of(bar) == "#=.-"
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Callable
+
+import pytest
+
+from popi_lib import (
+    BufferSink, Frame, MarkupTemplate, ProgressBar, ProgressGroup, StreamFrame, set_color_support
+)
+
+pyte = pytest.importorskip("pyte")
+
+PREAMBLE = "output before\nthe frame\n"
+
+
+@pytest.fixture(autouse=True)
+def colors():
+    set_color_support(True)
+    yield
+    set_color_support(None)
+
+
+def terminal(output: str) -> pyte.Screen:
+    """Feed output into an emulated terminal, with line feeds also returning the cursor to the first column."""
+    screen = pyte.Screen(80, 40)
+    screen.set_mode(pyte.modes.LNM)
+    pyte.Stream(screen).feed(output)
+    return screen
+
+
+def screen_state(screen: pyte.Screen) -> tuple:
+    """The text, colors and styles of every cell and the cursor position."""
+    cells = tuple(
+        tuple(
+            (char.data, char.fg, char.bg, char.bold, char.italics, char.underscore)
+            for char in (screen.buffer[y][x] for x in range(screen.columns))
+        )
+        for y in range(screen.lines)
+    )
+    return cells, screen.cursor.y
+
+
+def assert_redrawn(output: str, rows: list[str]) -> None:
+    """Check that the output shows the same as drawing the rows from scratch below the preamble."""
+    expected = terminal(PREAMBLE + "".join(f"\033[K{row}\n" for row in rows))
+    actual = terminal(output)
+    assert screen_state(actual) == screen_state(expected), "\n".join(actual.display) + "\n---\n" + "\n".join(
+        expected.display
+    )
+
+
+def check_steps(frame: Frame, steps: list[Callable[[Frame], object]]) -> None:
+    frame.sink.write(PREAMBLE)
+    with frame:
+        assert_redrawn(frame.sink.getvalue(), frame._build_frame())
+        for step in steps:
+            step(frame)
+            frame.print_frame()
+            assert_redrawn(frame.sink.getvalue(), frame._build_frame())
+
+
+def test_frame_updates_match_full_redraw():
+    text = "This is another new line - "
+    edits = [text + "a ", text + "a <i>lo", text + "a <i>looong<reset> line", "short"]
+    check_steps(
+        Frame(
+            "<b><bright_white>Hello<reset> <u>World<reset>!\n<hr>\n<cyan_bg><black><i> A test. \nWelcome",
+            2,
+            frame_style="<bright_cyan>",
+            sink=BufferSink(),
+        ),
+        [
+            lambda frame: frame.add_horizontal_rule().add_line("This is a new line"),
+            lambda frame: frame.add_line(text),
+            *(lambda frame, edit=edit: frame.edit_line(6, edit) for edit in edits),
+            lambda frame: frame.edit_line(0, "<green>Hello<reset> World!"),
+            lambda frame: (frame.lines.pop(), frame.lines.pop()),
+            lambda frame: frame.add_line("<red_bg>unclosed background"),
+            lambda frame: frame.add_line("<red_bg>unclosed background and a much longer line"),
+            lambda frame: frame.edit_line(-1, "<blue>x"),
+        ],
+    )
+
+
+def test_unchanged_frame_writes_nothing():
+    frame = Frame(["a", "b"], sink=BufferSink())
+    with frame:
+        frame.sink.clear()
+        frame.print_frame()
+        assert frame.sink.getvalue() == ""
+
+
+def test_progress_group_updates_match_full_redraw():
+    sink = BufferSink()
+    bars = [ProgressBar(10, 20, prefix=f"<cyan>bar {i}<reset> ", sink=sink) for i in range(3)]
+    group = ProgressGroup(bars, sink=sink)
+    sink.write(PREAMBLE)
+    extra = ProgressBar(5, 20, prefix="extra ", sink=sink)
+    steps = [
+        lambda: bars[0].add(3),
+        lambda: [bar.add(1) for bar in bars],
+        lambda: group.add(extra),
+        lambda: extra.set(3),
+        lambda: group.remove(bars[1]),
+        lambda: group.remove(bars[0]),
+        lambda: [bar.set(bar.total) for bar in group.bars],
+    ]
+    group.refresh()
+    assert_redrawn(sink.getvalue(), group._rows())
+    for step in steps:
+        step()
+        group.refresh()
+        assert_redrawn(sink.getvalue(), group._rows())
+
+    written = len(sink.getvalue())
+    group.refresh()
+    assert len(sink.getvalue()) == written
+
+
+def test_viewport_updates_match_full_redraw():
+    check_steps(
+        Frame([f"<b>line<reset> {i}" for i in range(50)], viewport=True, height=5, sink=BufferSink()),
+        [
+            lambda frame: frame.add_line("<green>a much longer new line<reset>"),
+            lambda frame: frame.scroll(-3),
+            lambda frame: frame.scroll_to(0),
+            lambda frame: frame.edit_line(2, "<red>edited<reset>"),
+            lambda frame: frame.follow(),
+            lambda frame: frame.add_line("last"),
+        ],
+    )
+
+
+def test_stream_frame_updates_match_full_redraw():
+    check_steps(
+        StreamFrame(capacity=4, content=["first"], min_interval=0.0, sink=BufferSink()),
+        [
+            lambda frame: frame.add_line("<yellow>second<reset>"),
+            lambda frame: frame.add_line(["third", "a much longer fourth line"]),
+            lambda frame: frame.add_line("fifth"),
+            lambda frame: frame.add_line(["sixth", "seventh", "eighth"]),
+            lambda frame: frame.add_horizontal_rule(),
+        ],
+    )
+
+
+def test_stream_frame_redraws_at_most_once_per_interval(clock):
+    frame = StreamFrame(capacity=3, min_interval=1.0, sink=BufferSink())
+    frame.sink.write(PREAMBLE)
+    prints = []
+    print_frame = frame.print_frame
+    frame.print_frame = lambda force=False: (prints.append(force), print_frame(force))
+
+    def lines():
+        for i in range(20):
+            clock.now += 0.25
+            yield f"line {i}\n"
+
+    with frame:
+        frame.print_frame()
+        frame.feed(lines())
+    assert prints == [False] * 6 + [True]
+    assert list(frame.lines) == ["line 17", "line 18", "line 19"]
+    assert_redrawn(frame.sink.getvalue(), frame._build_frame())
+
+
+def test_stream_frame_draws_held_back_lines_when_feed_goes_quiet():
+    frame = StreamFrame(capacity=5, min_interval=0.05, sink=BufferSink())
+    shown = []
+
+    def lines():
+        for i in range(3):
+            yield f"line {i}"
+        time.sleep(0.3)
+        shown.append(terminal(frame.sink.getvalue()).display)
+
+    with frame:
+        frame.feed(lines())
+    assert "line 2" in "\n".join(shown[0])
+
+
+def test_stream_frame_draws_held_back_lines_when_afeed_goes_quiet():
+    frame = StreamFrame(capacity=5, min_interval=0.05, sink=BufferSink())
+    shown = []
+
+    async def lines():
+        for i in range(3):
+            yield f"line {i}"
+        await asyncio.sleep(0.3)
+        shown.append(terminal(frame.sink.getvalue()).display)
+
+    with frame:
+        asyncio.run(frame.afeed(lines()))
+    assert "line 2" in "\n".join(shown[0])
+
+
+def assert_bar_redrawn(bar: ProgressBar) -> None:
+    """Check that the output of a bar shows the same as drawing its current state on an empty line."""
+    actual = terminal(bar.sink.getvalue())
+    expected = terminal(bar.render())
+    assert screen_state(actual) == screen_state(expected), actual.display[0] + "\n" + expected.display[0]
+
+
+def test_progress_bar_clears_the_rest_of_a_shorter_line(clock):
+    bar = ProgressBar(1_000_000, 10, show_rate=True, sink=BufferSink())
+    bar.display()
+    for _ in range(5):
+        clock.now += 0.125
+        bar.add(31_250).display()
+    assert bar.render().endswith(" 250000.00 it/s")
+    clock.now += 10
+    bar.display()
+    assert bar.render().endswith(" 0.00 it/s")
+    assert_bar_redrawn(bar)
+
+
+def test_progress_bar_template_prefix_gets_shorter():
+    bar = ProgressBar(10, 10, prefix=MarkupTemplate("<b>{name}<reset> "), sink=BufferSink())
+    bar.set_fields(name="longname").display()
+    bar.set_fields(name="x").add(1).display()
+    assert bar.render().startswith("\033[1mx")
+    assert_bar_redrawn(bar)
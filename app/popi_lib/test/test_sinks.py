@@ -0,0 +1,91 @@
+from __future__ import annotations
+import io
+import sys
+
+import pytest
+
+from popi_lib import (
+    BufferSink, Frame, MarkupTemplate, ProgressBar, ProgressGroup, Sink, StreamSink, set_color_support
+)
+
+
+class TtyStream(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+@pytest.fixture(autouse=True)
+def reset_color_support():
+    yield
+    set_color_support(None)
+
+
+@pytest.mark.parametrize("colors", [True, False, None])
+def test_stdout_interactivity_ignores_color_override(monkeypatch, colors):
+    set_color_support(colors)
+    sink = StreamSink()
+    monkeypatch.setattr(sys, "stdout", TtyStream())
+    assert sink.interactive
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    assert not sink.interactive
+
+
+def test_stream_interactivity():
+    assert StreamSink(TtyStream()).interactive
+    assert not StreamSink(io.StringIO()).interactive
+    assert StreamSink(io.StringIO(), interactive=True).interactive
+
+
+def test_snapshots_leave_out_template_escape_codes():
+    set_color_support(True)
+    template = MarkupTemplate("<green>{progress}<reset> ")
+    bar = ProgressBar(10, 10, prefix=template, sink=BufferSink(interactive=False))
+    group = ProgressGroup([bar], sink=BufferSink(interactive=False))
+    assert "\033" in bar.render()
+    bar.set(5).display(force=True)
+    group.refresh(force=True)
+    for sink in (bar.sink, group.sink):
+        assert "\033" not in sink.getvalue()
+        assert sink.getvalue().startswith("5 #####")
+
+
+def test_sink_requires_write():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_frame_colors_follow_the_sink(monkeypatch):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    tty_sink = StreamSink(TtyStream())
+    with Frame("<green>hi<reset>", sink=tty_sink):
+        pass
+    assert "\033[32mhi" in tty_sink.stream.getvalue()
+
+    monkeypatch.setattr(sys, "stdout", TtyStream())
+    pipe_sink = StreamSink(io.StringIO(), interactive=True)
+    with Frame("<green>hi<reset>", sink=pipe_sink) as frame:
+        frame.edit_line(0, "<green>ho<reset>").print_frame()
+    output = pipe_sink.stream.getvalue()
+    assert "\033[K" in output
+    assert "\033[32m" not in output and "\033[0m" not in output
+
+
+def test_group_renders_bars_with_the_colors_of_its_sink(monkeypatch):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    bar = ProgressBar(10, 10, prefix=MarkupTemplate("<green>{progress}<reset> "))
+    sink = StreamSink(TtyStream())
+    ProgressGroup([bar], sink=sink).refresh()
+    assert "\033[32m0" in sink.stream.getvalue()
+    assert "\033" not in bar.render()
+
+
+def test_sink_color_support():
+    assert StreamSink(TtyStream()).colors
+    assert not StreamSink(io.StringIO()).colors
+    assert not StreamSink(io.StringIO(), interactive=True).colors
+    assert StreamSink(io.StringIO(), colors=True).colors
+    assert BufferSink().colors
+    assert not BufferSink(interactive=False).colors
+    set_color_support(False)
+    assert not StreamSink(TtyStream()).colors
+    assert BufferSink(colors=True).colors
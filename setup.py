@@ -23,7 +23,7 @@ setup(
         'colorama~=0.4.6'
     ],
     extras_require={
-        'dev': ['pytest>=7.0', 'twine>=4.0.2']
+        'dev': ['pytest>=7.0', 'pyte>=0.8', 'twine>=4.0.2']
     },
     python_requires='>=3.7',
 )